@@ -48,9 +48,11 @@ def main():
 	PARAM_8 = 3.0
 	PARAM_9 = 4.0
 
-	m.set_mosquito_version(True)
-	m.set_position_board(True)
-	m.set_PID(RATE_ROLL_P, RATE_ROLL_I, RATE_ROLL_D,RATE_PITCH_P, RATE_PITCH_I, RATE_PITCH_D, RATE_YAW_P, RATE_YAW_I, RATE_D2R, LEVEL_P, ALTH_P, ALTH_V_P, ALTH_V_I, ALTH_V_D, ALTH_MIN_A, PARAM_6, PARAM_7, PARAM_8, PARAM_9)
+	# Send all the parameters to the Mosquito with a single write
+	with m.batch():
+		m.set_mosquito_version(True)
+		m.set_position_board(True)
+		m.set_PID(RATE_ROLL_P, RATE_ROLL_I, RATE_ROLL_D,RATE_PITCH_P, RATE_PITCH_I, RATE_PITCH_D, RATE_YAW_P, RATE_YAW_I, RATE_D2R, LEVEL_P, ALTH_P, ALTH_V_P, ALTH_V_I, ALTH_V_D, ALTH_MIN_A, PARAM_6, PARAM_7, PARAM_8, PARAM_9)
 
 	m.get_PID()
 
@@ -20,6 +20,7 @@ parser = argparse.ArgumentParser(description='Mosquito get linear velocities')
 parser.add_argument('-s','--save', type=int, action='store', help="CSV data storage")
 parser.add_argument('-d','--duration', type=int, action='store', help="data log duration in seconds")
 parser.add_argument('-t','--timestamp', type=int, action='store', help="store time stamp of measures")
+parser.add_argument('-r','--rate', type=float, action='store', default=50, help="number of measures per second")
 
 args = parser.parse_args()
 
@@ -38,37 +39,45 @@ def cleanup(shared_state):
 	if shared_state.file:
 		shared_state.file.close()
 
-def main(shared_state, save_data, duration, timestamp):
+def main(shared_state, save_data, duration, timestamp, rate):
 	"""
 	Function that gets executed when the script is directly
 	called from the command line.
 
 	What it does is request the linear velocities of the Mosquito
-	and print them to the command line. If requested, velocities
-	are also stored in a csv file
+	at the specified rate and print them to the command line. If
+	requested, velocities are also stored in a csv file
 	"""
 	Mosquito = mapi.Mosquito()
 	Mosquito.connect()
 	
-	log = True
 	intial_time = time.time()
 	
 	if save_data:
 		shared_state.file = open("velocities.csv", "w") 
 
-	while log:	
-		velocities = Mosquito.get_velocities()
-		if isinstance(velocities, tuple):
-			if timestamp:
-				velocities = tuple([time.time() - intial_time] + list(velocities))
-			# print velocities to terminal so that one can see what's being stored
-			print(velocities)
-			# write velocities to csv if requested
-			if save_data:
-				shared_state.file.write(",".join(map(str, velocities)) + "\n")
+	def log(velocities):
+		"""
+		Print and store the velocities as they arrive
+		"""
+		if timestamp:
+			velocities = tuple([time.time() - intial_time] + list(velocities))
+		# print velocities to terminal so that one can see what's being stored
+		print(velocities)
+		# write velocities to csv if requested
+		if save_data:
+			shared_state.file.write(",".join(map(str, velocities)) + "\n")
 
-		if duration:
-			log = time.time() - intial_time < duration
+	Mosquito.schedule('velocities', rate, log)
+
+	if duration:
+		time.sleep(duration)
+	else:
+		while True:
+			time.sleep(1)
+
+	Mosquito.unschedule()
+	Mosquito.disconnect()
 
 	if save_data:
 		shared_state.file.close()
@@ -76,6 +85,6 @@ def main(shared_state, save_data, duration, timestamp):
 if __name__ == "__main__":
 	shared_state = SharedState()
 	try:
-		main(shared_state, args.save, args.duration, args.timestamp)
+		main(shared_state, args.save, args.duration, args.timestamp, args.rate)
 	except KeyboardInterrupt:
 		cleanup(shared_state)
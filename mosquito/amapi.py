@@ -0,0 +1,725 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import math
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+import mosquito.msppg as msppg
+from mosquito.coms import READ_SIZE, _MOTION_SETPOINTS
+from mosquito.mapi import State, StateTimestamps
+from mosquito.notify import Reply
+
+class MosquitoProtocol(asyncio.BufferedProtocol):
+	"""
+	asyncio protocol that receives the data sent by the Mosquito
+	straight into a preallocated buffer and feeds it to an MSP parser
+	"""
+
+	def __init__(self, parser, on_connection_lost, read_size=READ_SIZE):
+		"""
+		Initialize the protocol
+
+		:param parser: parser of the received data
+		:type parser: msppg.MSP_Parser
+		:param on_connection_lost: function called with the exception (or None)
+		that closed the connection
+		:type on_connection_lost: callable
+		:param read_size: maximum number of bytes received at once
+		:type read_size: integer
+		"""
+		self.__parser = parser
+		self.__on_connection_lost = on_connection_lost
+		self.__buffer = memoryview(bytearray(read_size))
+
+	def get_buffer(self, sizehint):
+		return self.__buffer
+
+	def buffer_updated(self, nbytes):
+		# Parse errors, including exceptions raised by handlers,
+		# are counted in the parser statistics
+		self.__parser.parse_bytes(self.__buffer[:nbytes])
+
+	def connection_lost(self, exc):
+		self.__on_connection_lost(exc)
+
+class AsyncMosquito(object):
+	"""
+	asyncio implementation of the Mosquito API. Every public method
+	of mapi.Mosquito is available as a coroutine with the same
+	name and parameters, except the _async getters, which are not
+	needed since the getters do not block the event loop, and the
+	methods that run on threads (schedule, unschedule, stream_motors
+	and stream_RC). Replies to requests resolve futures, so waiting
+	for them does not block the event loop.
+	"""
+
+	def __init__(self, address='192.168.4.1', port=80, timeout=4, read_size=READ_SIZE):
+		"""
+		Initialize the API instance
+
+		:param address: Mosquito IP
+		:type address: string
+		:param port: port number where to connect
+		:type port: integer
+		:param timeout: allowed period of time in seconds to elapse before raising an exception
+		:type timeout: integer
+		:param read_size: maximum number of bytes received at once
+		:type read_size: integer
+		"""
+		self.__address = address
+		self.__port = port
+		self.__timeout = timeout
+		self.__read_size = read_size
+		self.__transport = None
+		self._parser = msppg.MSP_Parser()
+		# Futures waiting for a reply, oldest first, indexed by message ID
+		self.__pending = {}
+		# Latest reply of every message ID, whether requested or not
+		self.__latest = {}
+		for name in ('POSITION_BOARD_CONNECTED', 'FIRMWARE_VERSION', 'ATTITUDE_RADIANS', 'GET_VELOCITIES',
+			'GET_MOTOR_NORMAL', 'GET_BATTERY_VOLTAGE', 'GET_PID_CONSTANTS', 'RC_NORMAL'):
+			getattr(self._parser, 'set_{}_Handler'.format(name))(self.__resolver(name), lazy=True)
+		# Messages sent inside a batch are accumulated per task
+		self.__batch = ContextVar('batch', default=None)
+		# Mosquito's status attributes
+		self.__motor_values = tuple([0]*4)
+		self.__led_status = tuple([0]*3)
+		self.__voltage = 0.0
+		# Mosquito's PID constants
+		self.__controller_constants = tuple([0]*19)
+
+	def __resolver(self, name):
+		"""
+		Create the handler of a reply, which resolves the oldest
+		future waiting for it
+
+		:param name: name of the reply message
+		:type name: string
+		:return: reply handler
+		:rtype: callable
+		"""
+		message_id = msppg.REQUEST_FRAMES[name][4]
+		pending = self.__pending[message_id] = deque()
+		def resolve(view):
+			reply = self.__latest[message_id] = Reply(monotonic(), view)
+			while pending:
+				future = pending.popleft()
+				# Futures of requests that timed out are cancelled
+				if not future.done():
+					future.set_result(reply)
+					return
+		return resolve
+
+	def __connection_lost(self, exc):
+		"""
+		Fail every future waiting for a reply when the connection is lost
+
+		:param exc: exception that closed the connection, if any
+		:type exc: Exception
+		:return: None
+		:rtype: None
+		"""
+		self.__transport = None
+		for pending in self.__pending.values():
+			while pending:
+				future = pending.popleft()
+				if not future.done():
+					future.set_exception(ConnectionError('Connection with the Mosquito lost'))
+
+	def _send_data(self, data, message=None):
+		"""
+		Send a serialized MSP message to the connected Mosquito
+
+		:param data: serialized data to send to the Mosquito
+		:type data: bytes
+		:param message: name of the MSP message if it is a setpoint, None otherwise
+		:type message: string
+		:return: None
+		:rtype:None
+		"""
+		batch = self.__batch.get()
+		if batch is not None:
+			batch.append((message, bytes(data)))
+			return
+		self.__write(data)
+
+	def __send_urgent(self, data):
+		"""
+		Send a serialized MSP message to the connected Mosquito straight away,
+		even inside a batch. The commands and motion setpoints of the current
+		batch are dropped, so that none of them is sent after it
+
+		:param data: serialized data to send to the Mosquito
+		:type data: bytes
+		:return: None
+		:rtype:None
+		"""
+		batch = self.__batch.get()
+		if batch is not None:
+			batch[:] = [item for item in batch if item[0] is not None and item[0] not in _MOTION_SETPOINTS]
+		self.__write(data)
+
+	def __write(self, data):
+		"""
+		Write data to the transport connected to the Mosquito
+
+		:param data: data to write
+		:type data: bytes
+		:return: None
+		:rtype:None
+		"""
+		if self.__transport is None:
+			raise ConnectionError('Please connect to a Mosquito')
+		self.__transport.write(data)
+
+	async def __request_replies(self, names, max_age=None):
+		"""
+		Request messages to the Mosquito and wait for their replies. Every
+		request is sent with a single write, straight away even inside a
+		batch, since the replies are awaited before leaving the batch
+
+		:param names: names of the requested messages
+		:type names: list
+		:param max_age: maximum age in seconds of a previously received reply to be returned
+		instead of sending a request. If None, a request is always sent
+		:type max_age: float
+		:return: replies, in the same order as the names
+		:rtype: list
+		"""
+		loop = asyncio.get_running_loop()
+		now = monotonic()
+		replies = []
+		requests = []
+		for name in names:
+			frame = msppg.REQUEST_FRAMES[name]
+			future = loop.create_future()
+			latest = self.__latest.get(frame[4])
+			if max_age is not None and latest is not None and now - latest.timestamp <= max_age:
+				future.set_result(latest)
+			else:
+				# Register the future before sending, so that the reply cannot be missed
+				self.__pending[frame[4]].append(future)
+				requests.append((frame, future))
+			replies.append(future)
+		if requests:
+			try:
+				self.__write(b''.join(frame for frame, _ in requests))
+			except:
+				# No reply will come, so the futures must not take the replies of later requests
+				for frame, future in requests:
+					self.__pending[frame[4]].remove(future)
+				raise
+		try:
+			return await asyncio.wait_for(asyncio.gather(*replies), self.__timeout)
+		except asyncio.TimeoutError:
+			raise TimeoutError("Timed out while waiting for response")
+
+	async def __request(self, name, max_age=None):
+		"""
+		Request a message to the Mosquito and wait for its reply
+
+		:param name: name of the requested message
+		:type name: string
+		:param max_age: maximum age in seconds of a previously received reply to be returned
+		instead of sending a request. If None, a request is always sent
+		:type max_age: float
+		:return: lazy view of the reply
+		:rtype: msppg.FrameView
+		"""
+		reply, = await self.__request_replies([name], max_age)
+		return reply.record
+
+	# Public methods
+	@contextmanager
+	def batch(self):
+		"""
+		Context manager that groups every message sent from the current
+		task while inside it and sends them to the Mosquito with a single
+		write when leaving it. Note that it is not a coroutine. If an
+		exception is raised inside the batch none of its messages are sent.
+		Requests of the getters are not grouped and are sent straight away,
+		and so are stop and disarm, which drop the commands and motor and
+		RC channel values of the batch sent before them.
+
+		:return: None
+		:rtype:None
+		"""
+		if self.__batch.get() is not None:
+			yield
+			return
+		# Messages of the batch as (message name, serialized message),
+		# the message name being None for everything but setpoints
+		token = self.__batch.set([])
+		try:
+			yield
+			data = b''.join(item[1] for item in self.__batch.get())
+		finally:
+			self.__batch.reset(token)
+		if data:
+			self.__write(data)
+
+	def get_link_stats(self):
+		"""
+		Get the statistics of the messages received from the Mosquito.
+		Note that it is not a coroutine.
+
+		:return: Messages received per message ID and parse errors per kind
+		:rtype: msppg.ParserStats
+		"""
+		return self._parser.stats
+
+	async def connect(self):
+		"""
+		Connect to the Mosquito
+
+		:return: None
+		:rtype:None
+		"""
+		# Before connecting, disconnect if already connected
+		await self.disconnect()
+		loop = asyncio.get_running_loop()
+		connection = loop.create_connection(
+			lambda: MosquitoProtocol(self._parser, self.__connection_lost, self.__read_size),
+			self.__address, self.__port)
+		self.__transport, _ = await asyncio.wait_for(connection, self.__timeout)
+
+	async def disconnect(self):
+		"""
+		Disconnect from the Mosquito
+
+		:return: None
+		:rtype:None
+		"""
+		if self.__transport is not None:
+			self.__transport.close()
+			self.__transport = None
+
+	async def position_board_connected(self, max_age=None):
+		"""
+		Check if the position board is connected to the Mosquito.
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: The status of the position board. True if connected and False otherwise
+		:rtype: bool
+		"""
+		return bool((await self.__request('POSITION_BOARD_CONNECTED', max_age)).positionBoardConnected)
+
+	async def get_firmware_version(self, max_age=None):
+		"""
+		Get the version of the firmware running on the Mosquito
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Firmware version
+		:rtype: int
+		"""
+		return (await self.__request('FIRMWARE_VERSION', max_age)).version
+
+	async def get_attitude(self, degrees=False, max_age=None):
+		"""
+		Get the orientation of the Mosquito
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Orientation of the Mosquito in radians, as roll, pitch and yaw
+		:rtype: namedtuple
+		"""
+		attitude = (await self.__request('ATTITUDE_RADIANS', max_age)).unpack()
+		if not degrees:
+			return attitude
+		return attitude._make([angle*180/math.pi for angle in attitude])
+
+	async def get_velocities(self, max_age=None):
+		"""
+		Get the linear velocities of the Mosquito
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Linear velocities of the Mosquito in meters per second, as velx, vely and velz
+		:rtype: namedtuple
+		"""
+		return (await self.__request('GET_VELOCITIES', max_age)).unpack()
+
+	async def get_voltage(self, max_age=None):
+		"""
+		Get the voltage of the battery in the Mosquito.
+		If not connected it returns 0.0
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Battery voltage in V
+		:rtype: float
+		"""
+		return (await self.__request('GET_BATTERY_VOLTAGE', max_age)).voltage
+
+	async def get_motors(self, max_age=None):
+		"""
+		Get the values of all motors
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: current motor values in the range 0-1. The values are ordered
+		so that the position in the tuple matches the motor index (fields m1 to m4)
+		:trype: namedtuple
+		"""
+		return (await self.__request('GET_MOTOR_NORMAL', max_age)).unpack()
+
+	async def get_PID(self, max_age=None):
+		"""
+		Get the constants of every PID controller in Hackflight.
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: current values for PID controllers. See 'set_PID()' documentation for tuple details
+		:trype: namedtuple
+		"""
+		return (await self.__request('GET_PID_CONSTANTS', max_age)).unpack()
+
+	async def get_RC(self, max_age=None):
+		"""
+		Get the values of the RC channels received by the Mosquito
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: values of the 6 RC channels in the range -1 to 1 (fields c1 to c6)
+		:rtype: namedtuple
+		"""
+		return (await self.__request('RC_NORMAL', max_age)).unpack()
+
+	async def get_state(self, degrees=False, max_age=None):
+		"""
+		Get the attitude, linear velocities, motor values and battery voltage of
+		the Mosquito. The four requests are sent with a single write, so the state
+		takes a single round trip and its values are close in time
+
+		:param degrees: get the attitude in degrees instead of radians
+		:type degrees: bool
+		:param max_age: maximum age in seconds of previously received values to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: attitude, velocities, motors and voltage as returned by their getters, the
+		monotonic times at which each of them was received (timestamps) and the difference
+		in seconds between the first and the last of them (spread)
+		:rtype: namedtuple
+		"""
+		replies = await self.__request_replies(
+			['ATTITUDE_RADIANS', 'GET_VELOCITIES', 'GET_MOTOR_NORMAL', 'GET_BATTERY_VOLTAGE'], max_age)
+		attitude, velocities, motors, voltage = [reply.record for reply in replies]
+		attitude = attitude.unpack()
+		if degrees:
+			attitude = attitude._make([angle*180/math.pi for angle in attitude])
+		timestamps = StateTimestamps._make(reply.timestamp for reply in replies)
+		return State(attitude, velocities.unpack(), motors.unpack(), voltage.voltage,
+			timestamps=timestamps, spread=max(timestamps) - min(timestamps))
+
+	async def get_motor(self, motor, max_age=None):
+		"""
+		Get the value of a specific motors
+
+		:param motor: Motor number whose value is wanted
+		:type motor: int
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: current motor value in the range 0-1
+		:trype: float
+		"""
+		motor_values = await self.get_motors(max_age)
+		return motor_values[motor-1]
+
+	async def arm(self):
+		"""
+		Arm the Mosquito
+
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.REQUEST_FRAMES['WP_ARM'])
+
+	async def disarm(self):
+		"""
+		Disarm the Mosquito. The message is sent straight away even inside
+		a batch, and the commands and motor and RC channel values of the
+		current batch are dropped
+
+		:return: None
+		:rtype: None
+		"""
+		self.__send_urgent(msppg.REQUEST_FRAMES['WP_DISARM'])
+		self.__motor_values = tuple([0]*4)
+
+	async def set_position_board(self, has_position_board):
+		"""
+		Set if the Mosquito has the positoning board
+
+		:param has_positioning_board: Indicates wether the Mosquito is equipped with
+		a position board or not.
+		:type has_positioning_board: bool
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_SET_POSITIONING_BOARD(has_position_board))
+
+	async def set_mosquito_version(self, is_mosquito_90):
+		"""
+		Set the version of the Mosquito (True meaning Mosquito 90 and False meaning
+		Mosquito 150)
+
+		:param is_mosquito_90: Indicates the version of the Mosquito
+		:type is_mosquito_90: bool
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_SET_MOSQUITO_VERSION(is_mosquito_90))
+
+	async def calibrate_ESCs(self):
+		"""
+		Calibrate ESCs with the MultiShot protocol. When this message is sent,
+		the calibration will be performed after powering off and on the board.
+
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_ESC_CALIBRATION(0))
+
+	async def calibrate_transmitter(self, stage):
+		"""
+		Trigger the different stages of the transmitter calibration
+
+		:param stage: Calibration stage
+		:type stage: int in the range 0-2
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_RC_CALIBRATION(stage))
+
+	async def set_motor(self, motor, value):
+		"""
+		Set the value of a motor
+
+		:param motor: Target motor number to set the value (integer in the range 1-4)
+		:type data: int
+		:param value: Desired motor value in the range 0-1 being 1 maximum speed and 0 motor stopped
+		:type value: float
+		:return: None
+		:trype: None
+		"""
+		motor_idx = motor-1
+		values = tuple([self.__motor_values[i] if i != motor_idx else value for i in range(4)])
+		await self.set_motors(values)
+
+	async def set_motors(self, values):
+		"""
+		Set the values of all motors in the specified order
+
+		:param values: 4 value list with desired motor values in
+		the range 0-1 being 1 maximum speed and 0 motor stopped.
+		:type values: list
+		:return: None
+		:trype: None
+		"""
+		self.__motor_values = values
+		self._send_data(msppg.serialize_SET_MOTOR_NORMAL(*values), 'SET_MOTOR_NORMAL')
+
+	async def set_RC(self, channels):
+		"""
+		Set the values of the RC channels, as if they were sent by a transmitter
+
+		:param channels: 6 value list with the values of the channels in the range -1 to 1.
+		In Hackflight's order: throttle, roll, pitch, yaw, aux 1 and aux 2
+		:type channels: list
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_SET_RC_NORMAL(*channels), 'SET_RC_NORMAL')
+
+	async def set_voltage(self, voltage):
+		"""
+		Set the voltage of the battery in the Mosquito.
+		This MSP message is only used by the ESP32 in
+		order to send the computed voltage to the STM32.
+		This message in the API can be used to override.
+
+		:param voltage: battery voltage in V
+		:type voltage: float
+		:return: None
+		:trype: None
+		"""
+		self.__voltage = voltage
+		self._send_data(msppg.serialize_SET_BATTERY_VOLTAGE(voltage))
+
+	async def set_PID(self, gyro_roll_P, gyro_roll_I, gyro_roll_D, gyro_pitch_P, gyro_pitch_I, gyro_pitch_D,
+		gyro_yaw_P, gyro_yaw_I, demands_to_rate, level_P, altHold_P, altHold_vel_P, altHold_vel_I,
+		altHold_vel_D, min_altitude, posHold_vel_P, posHold_vel_I, posHold_vel_D, param9):
+		"""
+		Set the constants of every PID controller in Hackflight.
+		See mapi.Mosquito.set_PID for the description of every parameter.
+
+		:return: None
+		:trype: None
+		"""
+		self.__controller_constants = gyro_roll_P, gyro_roll_I, gyro_roll_D, gyro_pitch_P, gyro_pitch_I, gyro_pitch_D, gyro_yaw_P, gyro_yaw_I, demands_to_rate, level_P, altHold_P, altHold_vel_P, altHold_vel_I, altHold_vel_D, min_altitude, posHold_vel_P, posHold_vel_I, posHold_vel_D, param9
+		self._send_data(msppg.serialize_SET_PID_CONSTANTS(*self.__controller_constants))
+
+	async def set_leds(self, red=None, green=None, blue=None):
+		"""
+		Set the on/off state of the LEDs. If any of the LEDs
+		is omitted in the method call its current status is preserved.
+
+		:param red: Status of red LED. A True/1 value will turn the LED on and a False/0 value off
+		:type red: bool
+		:param green: Status of green LED. A True/1 value will turn the LED on and a False/0 value off
+		:type green: bool
+		:param blue: Status of blue LED. A True/1 value will turn the LED on and a False/0 value off
+		:type blue: bool
+		:return: None
+		:rtype: None
+		"""
+		self.__led_status = tuple([self.__led_status[idx] if value is None else value for idx, value in enumerate([red, green, blue])])
+		self._send_data(msppg.serialize_SET_LEDS(*self.__led_status), 'SET_LEDS')
+
+	async def clear_EEPROM(self, section):
+		"""
+		Clear all or a specific section of the EEPROM
+
+		:param section: Section to clear. 0 - Parameters, 1 - Mission, 2 - all
+		:type section: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_CLEAR_EEPROM(section))
+
+	async def stop(self):
+		"""
+		Trigger an emergency stop that will hault the Mosquito and stop any action
+		being performed. The message is sent straight away even inside a batch, and
+		the commands and motor and RC channel values of the current batch are dropped
+
+		:return: None
+		:rtype: None
+		"""
+		self.__send_urgent(msppg.serialize_SET_EMERGENCY_STOP(0))
+		self.__motor_values = tuple([0]*4)
+
+	async def execute_mission(self):
+		"""
+		Begin the execution of a flight mission stored in the EEPROM
+
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_MISSION_BEGIN(1))
+
+	async def take_off(self, height=100):
+		"""
+		Take off and hover at the specified height
+
+		:param height: Target take off height. By default, this height is 1m. When reached, the drone will start hovering
+		:type height: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_TAKE_OFF(height, 0))
+
+	async def land(self):
+		"""
+		Land the drone
+
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_LAND(0))
+
+	async def hover(self, time):
+		"""
+		Hover at the current position for the specified amount of time
+
+		:param time: Number of seconds that the hover action should last
+		:type time: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_HOVER(time, 0))
+
+	async def change_height(self, height):
+		"""
+		Set the target height at which the Mosquito
+		should hover.
+
+		:param height: The desired altitude in centimeters
+		:type height: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_CHANGE_ALTITUDE(height, 0))
+
+	async def move_forward(self, time):
+		"""
+		Move forward for the specified amount of time
+
+		:param time: Number of seconds the action should last
+		:type time: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_GO_FORWARD(time, 0))
+
+	async def move_backwards(self, time):
+		"""
+		Move backwards for the specified amount of time
+
+		:param time: Number of seconds the action should last
+		:type time: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_GO_BACKWARD(time, 0))
+
+	async def move_left(self, time):
+		"""
+		Move left for the specified amount of time
+
+		:param time: Number of seconds the action should last
+		:type time: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_GO_LEFT(time, 0))
+
+	async def move_right(self, time):
+		"""
+		Move right for the specified amount of time
+
+		:param time: Number of seconds the action should last
+		:type time: int
+		:return: None
+		:rtype: None
+		"""
+		self._send_data(msppg.serialize_WP_GO_RIGHT(time, 0))
+
+	async def turn(self, angle):
+		"""
+		Turn the specified angle. If the angle is greater than 0
+		the rotation will be counter clockwise, and clockwise otherwise
+
+		:param angle: Number of degrees the drone should turn
+		:type angle: int
+		:return: None
+		:rtype: None
+		"""
+		if angle > 0:
+			self._send_data(msppg.serialize_WP_TURN_CCW(angle, 0))
+		else:
+			self._send_data(msppg.serialize_WP_TURN_CW(angle, 0))
@@ -5,10 +5,285 @@
 # Date: 01-05-2019
 
 
+import selectors
 import socket
-from threading import Thread
+from collections import deque
+from contextlib import contextmanager
+from threading import Thread, Condition, RLock, local
 import mosquito.msppg as msppg
 
+# Default maximum number of bytes read from the socket at once
+READ_SIZE = 4096
+# Number of reads of the maximum size that fit in the receive ring buffer
+RING_SLOTS = 8
+# Priorities of the sent messages. Normal messages are sent in the order
+# they were sent. Urgent messages are sent before any message waiting to be
+# sent, and the commands and motion setpoints waiting to be sent are dropped
+# so that none of them is sent after the urgent message
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+# Setpoint messages that move the Mosquito, which are dropped by urgent messages
+_MOTION_SETPOINTS = frozenset(('SET_MOTOR_NORMAL', 'SET_RC_NORMAL'))
+
+# Kinds of the items waiting to be written
+_COMMAND = 'command'
+_SETPOINT = 'setpoint'
+_REQUEST = 'request'
+
+class Reactor(object):
+	"""
+	Shared I/O engine. A single thread waits on the sockets of every
+	registered connection at once using selectors (epoll on Linux),
+	reads whatever is available on each of them in one readiness
+	pass and feeds it to the parser of that connection. This allows
+	running many Mosquitos with a fixed number of threads.
+	"""
+
+	def __init__(self, read_size=READ_SIZE):
+		"""
+		Initialize the reactor. Its thread is started when the first
+		connection is registered
+
+		:param read_size: maximum number of bytes read from a socket at once
+		:type read_size: integer
+		"""
+		self.__selector = selectors.DefaultSelector()
+		self.__lock = RLock()
+		self.__buffer = memoryview(bytearray(read_size))
+		# Socket pair used to wake the reactor thread up when the
+		# set of registered connections changes or when closing
+		self.__wakeup_reader, self.__wakeup_writer = socket.socketpair()
+		self.__wakeup_reader.setblocking(False)
+		self.__selector.register(self.__wakeup_reader, selectors.EVENT_READ)
+		self.__thread = None
+		self.__running = False
+
+	def __wakeup(self):
+		"""
+		Wake the reactor thread up
+
+		:return: None
+		:rtype:None
+		"""
+		try:
+			self.__wakeup_writer.send(b'\0')
+		except OSError:
+			None
+
+	def __run(self):
+		"""
+		Wait for data on the registered sockets and feed it to their parsers.
+		This method runs on the reactor thread
+
+		:return: None
+		:rtype:None
+		"""
+		buffer = self.__buffer
+		while self.__running:
+			events = self.__selector.select()
+			with self.__lock:
+				for key, _ in events:
+					if key.fileobj is self.__wakeup_reader:
+						try:
+							self.__wakeup_reader.recv(READ_SIZE)
+						except OSError:
+							None
+						continue
+					sock, parser = key.fileobj, key.data
+					# A socket may have been unregistered after select returned
+					if self.__selector.get_map().get(sock) is not key:
+						continue
+					try:
+						received = sock.recv_into(buffer)
+					except (socket.timeout, BlockingIOError):
+						continue
+					except OSError:
+						received = 0
+					if received == 0:
+						# Connection closed, stop waiting on it
+						self.__selector.unregister(sock)
+						continue
+					# Parse errors, including exceptions raised by handlers,
+					# are counted in the parser statistics
+					parser.parse_bytes(buffer[:received])
+
+	def register(self, sock, parser):
+		"""
+		Start feeding the data received on a connected socket to a parser
+
+		:param sock: connected socket
+		:type sock: socket.socket
+		:param parser: parser of the data received on the socket
+		:type parser: msppg.MSP_Parser
+		:return: None
+		:rtype:None
+		"""
+		with self.__lock:
+			self.__selector.register(sock, selectors.EVENT_READ, parser)
+			if not self.__running:
+				self.__running = True
+				self.__thread = Thread(target=self.__run)
+				self.__thread.daemon = True
+				self.__thread.start()
+		self.__wakeup()
+
+	def unregister(self, sock):
+		"""
+		Stop receiving data on a socket. It must be called before closing it
+
+		:param sock: registered socket
+		:type sock: socket.socket
+		:return: None
+		:rtype:None
+		"""
+		with self.__lock:
+			try:
+				self.__selector.unregister(sock)
+			except (KeyError, ValueError):
+				# Already unregistered because the connection was closed
+				None
+		self.__wakeup()
+
+	def close(self):
+		"""
+		Stop the reactor thread and release its resources. Connections
+		still registered stop receiving data
+
+		:return: None
+		:rtype:None
+		"""
+		with self.__lock:
+			self.__running = False
+		self.__wakeup()
+		if self.__thread is not None:
+			self.__thread.join()
+		self.__selector.close()
+		self.__wakeup_reader.close()
+		self.__wakeup_writer.close()
+
+class _Outbox(object):
+	"""
+	Data waiting to be written to a connection by its writer thread
+	"""
+
+	def __init__(self):
+		"""
+		Initialize an empty outbox
+		"""
+		self.__condition = Condition()
+		self.__urgent = []
+		# Items as (kind, data), where data is the serialized message
+		# for commands and the message name for setpoints
+		self.__items = deque()
+		# Latest serialized setpoint of the setpoint messages waiting to be written,
+		# indexed by message name. A newer setpoint replaces the one waiting to be written
+		self.__setpoints = {}
+		self.__closed = False
+
+	def put(self, data, kind=_COMMAND):
+		"""
+		Queue a message to be written after the ones already queued
+
+		:param data: serialized message
+		:type data: bytes
+		:param kind: _COMMAND or _REQUEST
+		:type kind: string
+		:return: None
+		:rtype:None
+		"""
+		with self.__condition:
+			# Data is copied, since callers may reuse their buffers
+			self.__items.append((kind, bytes(data)))
+			self.__condition.notify()
+
+	def put_setpoint(self, message, data):
+		"""
+		Queue a setpoint message. If a setpoint of the same message is
+		already queued it is dropped, and if it is the last queued message
+		the new setpoint takes its place. Otherwise the new setpoint is
+		queued last, so that it is not written before older messages
+
+		:param message: name of the MSP message
+		:type message: string
+		:param data: serialized setpoint
+		:type data: bytes
+		:return: None
+		:rtype:None
+		"""
+		item = (_SETPOINT, message)
+		with self.__condition:
+			if message not in self.__setpoints:
+				self.__items.append(item)
+			elif self.__items[-1] != item:
+				self.__items.remove(item)
+				self.__items.append(item)
+			self.__setpoints[message] = data
+			self.__condition.notify()
+
+	def put_urgent(self, data):
+		"""
+		Queue a message to be written before every other message. The
+		commands and motion setpoints already queued are dropped, so that
+		none of them is written after it. Requests are kept, since their
+		replies are awaited
+
+		:param data: serialized message
+		:type data: bytes
+		:return: None
+		:rtype:None
+		"""
+		with self.__condition:
+			self.__items = deque(item for item in self.__items if _kept(item))
+			for message in _MOTION_SETPOINTS:
+				self.__setpoints.pop(message, None)
+			self.__urgent.append(bytes(data))
+			self.__condition.notify()
+
+	def close(self):
+		"""
+		Stop accepting messages. The writer stops once the queued ones are written
+
+		:return: None
+		:rtype:None
+		"""
+		with self.__condition:
+			self.__closed = True
+			self.__condition.notify()
+
+	def take(self):
+		"""
+		Wait until there are messages to write and take all of them,
+		urgent ones first
+
+		:return: data to write at once, or None when closed and empty
+		:rtype: bytes
+		"""
+		with self.__condition:
+			while not self.__urgent and not self.__items and not self.__closed:
+				self.__condition.wait()
+			chunks = self.__urgent
+			self.__urgent = []
+			for kind, data in self.__items:
+				if kind == _SETPOINT:
+					data = self.__setpoints.pop(data)
+				chunks.append(data)
+			self.__items.clear()
+		if not chunks:
+			return None
+		return b''.join(chunks)
+
+def _kept(item):
+	"""
+	Check if a queued item is kept when an urgent message is sent
+
+	:param item: queued item as (kind, data)
+	:type item: tuple
+	:return: True if kept and False if dropped
+	:rtype: bool
+	"""
+	kind, data = item
+	return kind == _REQUEST or (kind == _SETPOINT and data not in _MOTION_SETPOINTS)
+
 class MosquitoComms(object):
 	"""
 	Communications class. This class is in charge
@@ -17,7 +292,7 @@ class MosquitoComms(object):
 	and receiving data.
 	"""
 
-	def __init__(self, address='192.168.4.1', port=80, timeout=4):
+	def __init__(self, address='192.168.4.1', port=80, timeout=4, read_size=READ_SIZE, receive_buffer_size=None, reactor=None):
 		"""
 		Initialize the WiFi communications class
 
@@ -27,74 +302,256 @@ class MosquitoComms(object):
 		:type port: integer
 		:param timeout: allowed period of time in seconds to elapse before raising an exception 
 		:type timeout: integer
+		:param read_size: maximum number of bytes read from the socket at once
+		:type read_size: integer
+		:param receive_buffer_size: size in bytes of the socket receive buffer (SO_RCVBUF).
+		If None, the system default is used
+		:type receive_buffer_size: integer
+		:param reactor: shared I/O reactor that receives the data of this connection. If
+		None, the connection runs its own receive thread
+		:type reactor: Reactor
 		"""
 		self.__address = address
 		self.__port = port
 		self.__timeout = timeout
+		self.__read_size = read_size
+		self.__receive_buffer_size = receive_buffer_size
+		self.__reactor = reactor
 		self.__socket = None
 		# Create a message parser and get ready to
 		# run it on a different thread
 		self._parser = msppg.MSP_Parser()
-		self.__thread = Thread(target=self.__run)
-		self.__thread.setDaemon(True)
+		self.__thread = None
 		self.__running = False
+		# Messages are sent from a writer thread
+		self.__outbox = None
+		self.__writer = None
+		self.__write_error = None
+		# Messages sent inside a batch are accumulated per thread
+		self.__batches = local()
 
-	def _send_data(self, data):
+	def _send_data(self, data, priority=PRIORITY_NORMAL):
 		"""
 		Send a serialized MSP message (or any data you want,
-		really) to the connected Mosquito
+		really) to the connected Mosquito. Urgent messages are sent before
+		any message waiting to be sent, and the commands and motion setpoints
+		waiting to be sent, including the ones of the current batch, are dropped
 
 		:param data: serialized data to send to the Mosquito
 		:type data: bytes
+		:param priority: PRIORITY_URGENT or PRIORITY_NORMAL
+		:type priority: int
+		:return: None
+		:rtype:None
+		"""
+		batch = getattr(self.__batches, 'buffer', None)
+		if batch is not None:
+			if priority != PRIORITY_URGENT:
+				batch.append((_COMMAND, None, bytes(data)))
+				return
+			# Like the rest of messages sent before an urgent
+			# message, the ones of the batch are not sent
+			batch[:] = [item for item in batch if _kept(item[:2])]
+		self.__check_writer()
+		if priority == PRIORITY_URGENT:
+			self.__outbox.put_urgent(data)
+		else:
+			self.__outbox.put(data)
+
+	def _send_requests(self, data):
+		"""
+		Send serialized MSP request messages to the connected Mosquito. Unlike
+		other messages, requests are sent straight away even inside a batch,
+		since their replies may be awaited before leaving it, and they are
+		not dropped by urgent messages
+
+		:param data: serialized request messages
+		:type data: bytes
+		:return: None
+		:rtype:None
+		"""
+		self.__check_writer()
+		self.__outbox.put(data, _REQUEST)
+
+	def _send_setpoint(self, message, *values):
+		"""
+		Send a setpoint message to the connected Mosquito. If a setpoint of
+		the same message is still waiting to be sent it is replaced, so that
+		only the most recent one is sent when the link is congested. The
+		message is serialized straight away, so that invalid values raise
+		an exception to the caller
+
+		:param message: name of the MSP message
+		:type message: string
+		:param values: values of the message fields
+		:return: None
+		:rtype:None
+		"""
+		data = getattr(msppg, 'serialize_{}'.format(message))(*values)
+		batch = getattr(self.__batches, 'buffer', None)
+		if batch is not None:
+			batch.append((_SETPOINT, message, data))
+			return
+		self.__check_writer()
+		self.__outbox.put_setpoint(message, data)
+
+	def __check_writer(self):
+		"""
+		Check that data can be queued to be written
+
 		:return: None
 		:rtype:None
 		"""
 		if self.__socket is None:
-			raise Exception('Please connect to a Mosquito')
+			raise ConnectionError('Please connect to a Mosquito')
+		# Errors of the writer thread are raised to the senders
+		if self.__write_error is not None:
+			raise self.__write_error
 
-		try:
-			self.__socket.send(data)
-		except:
-			raise Exception('Timeout when trying to send: {}'.format(data))
+	def __send(self, sock, outbox):
+		"""
+		Write the queued data to the socket. Everything queued by the time
+		the writer is ready is sent with a single write, urgent messages first.
+		This method is intended to run on a different thread
 
-	def __run(self):
+		:param sock: connected socket to write to
+		:type sock: socket.socket
+		:param outbox: data waiting to be written
+		:type outbox: _Outbox
+		:return: None
+		:rtype:None
 		"""
-		Run an instance of an MSP parser. Upon receiving a byte it
-		gets fed to and parsed by the MSP parser.
+		while True:
+			try:
+				data = outbox.take()
+			except Exception as e:
+				# Raised to the senders instead of stopping the writer silently
+				self.__write_error = e
+				return
+			if data is None:
+				return
+			try:
+				sock.sendall(data)
+			except Exception:
+				self.__write_error = Exception('Timeout when trying to send {} bytes'.format(len(data)))
+				return
+
+	def __run(self, sock):
+		"""
+		Run an instance of an MSP parser. Every chunk of received bytes
+		gets fed to and parsed by the MSP parser at once.
 		This method is intended to run on a different thread that
 		constantly checks if new bytes are available and processes them
 
+		:param sock: connected socket to read from
+		:type sock: socket.socket
 		:return: None
 		:rtype:None		
 		"""
-		while self.__running:
+		# Bytes are received straight into a preallocated ring buffer and
+		# handed to the parser as memoryview slices of it, without copies.
+		# Every read is contiguous: the ring wraps around when there is not
+		# enough room left for a full read
+		read_size = self.__read_size
+		ring = memoryview(bytearray(read_size * RING_SLOTS))
+		offset = 0
+		# The thread stops when disconnecting or when connecting again,
+		# which replaces the socket
+		while self.__running and self.__socket is sock:
+			if offset + read_size > len(ring):
+				offset = 0
 			try:
-				byte = self.__socket.recv(1)
-				self._parser.parse(byte)
-			except:
-				None
+				received = sock.recv_into(ring[offset:offset + read_size])
+			except socket.timeout:
+				# Nothing received for a while, check if still running
+				continue
+			except OSError:
+				# The socket has been closed by disconnect()
+				break
+			if received == 0:
+				# Connection closed by the Mosquito
+				break
+			# Parse errors, including exceptions raised by handlers,
+			# are counted in the parser statistics
+			self._parser.parse_bytes(ring[offset:offset + received])
+			offset += received
 
 	def __start(self):
 		"""
-		Start the parser thread
+		Start the writer and parser threads for the current connection
 
 		:return: None
 		:rtype:None		
 		"""
+		self.__write_error = None
+		self.__outbox = _Outbox()
+		self.__writer = Thread(target=self.__send, args=(self.__socket, self.__outbox))
+		self.__writer.daemon = True
+		self.__writer.start()
+		if self.__reactor is not None:
+			self.__reactor.register(self.__socket, self._parser)
+			return
 		self.__running = True
-		if self.__thread.ident is None:
-			self.__thread.start()
+		self.__thread = Thread(target=self.__run, args=(self.__socket,))
+		self.__thread.daemon = True
+		self.__thread.start()
 
 	def __stop(self):
 		"""
-		Stop the parser thread
+		Stop the parser thread, and the writer thread once
+		the data waiting to be sent has been written
 
 		:return: None
 		:rtype:None		
 		"""
+		if self.__writer is not None:
+			self.__outbox.close()
+			self.__writer.join(self.__timeout)
+			self.__writer = None
+		if self.__reactor is not None and self.__socket is not None:
+			self.__reactor.unregister(self.__socket)
 		self.__running = False
 
 	# Public methods
+	@contextmanager
+	def batch(self):
+		"""
+		Context manager that groups every message sent from the calling
+		thread while inside it and sends them to the Mosquito with a single
+		write when leaving it. Batches can be nested, in which case messages
+		are sent when leaving the outermost one. If an exception is raised
+		inside the batch none of its messages are sent. Requests and urgent
+		messages are not grouped and are sent straight away, and the commands
+		and motion setpoints of the batch sent before urgent messages are dropped.
+
+		:return: None
+		:rtype:None
+		"""
+		if getattr(self.__batches, 'buffer', None) is not None:
+			yield
+			return
+		# Messages of the batch as (kind, message name, serialized message),
+		# the message name being None for commands
+		self.__batches.buffer = []
+		try:
+			yield
+			data = b''.join(item[-1] for item in self.__batches.buffer)
+		finally:
+			self.__batches.buffer = None
+		if data:
+			self.__check_writer()
+			self.__outbox.put(data)
+
+	def get_link_stats(self):
+		"""
+		Get the statistics of the messages received from the Mosquito.
+		Counters are updated in place as messages arrive.
+
+		:return: Messages received per message ID and parse errors per kind
+		:rtype: msppg.ParserStats
+		"""
+		return self._parser.stats
+
 	def connect(self):
 		"""
 		Connect to the Mosquito
@@ -106,6 +563,10 @@ class MosquitoComms(object):
 		self.disconnect()
 		self.__socket = socket.socket()
 		self.__socket.settimeout(self.__timeout)
+		# Messages are small and latency matters, so they are not delayed by Nagle's algorithm
+		self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		if self.__receive_buffer_size is not None:
+			self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.__receive_buffer_size)
 		self.__socket.connect((self.__address, self.__port))
 		self.__start()
 
@@ -6,9 +6,29 @@
 
 import time
 import math
+from collections import namedtuple
 import mosquito.msppg as msppg
-from mosquito.coms import MosquitoComms
-from mosquito.notify import publisher, Subscriber
+from mosquito.coms import MosquitoComms, Reactor, PRIORITY_URGENT
+from mosquito.notify import PendingReplies, chain, gather
+from mosquito.scheduler import TelemetryScheduler, SetpointStream
+
+# Values that can be requested periodically, with the message that carries
+# them and the function that gets the value from the lazy view of the message
+_TELEMETRY = {
+	'position_board_connected': ('POSITION_BOARD_CONNECTED', lambda view: bool(view.positionBoardConnected)),
+	'firmware_version': ('FIRMWARE_VERSION', lambda view: view.version),
+	'attitude': ('ATTITUDE_RADIANS', lambda view: view.unpack()),
+	'velocities': ('GET_VELOCITIES', lambda view: view.unpack()),
+	'motors': ('GET_MOTOR_NORMAL', lambda view: view.unpack()),
+	'voltage': ('GET_BATTERY_VOLTAGE', lambda view: view.voltage),
+	'PID': ('GET_PID_CONSTANTS', lambda view: view.unpack()),
+	'RC': ('RC_NORMAL', lambda view: view.unpack()),
+}
+
+# Values of the Mosquito received at about the same time
+State = namedtuple('State', ('attitude', 'velocities', 'motors', 'voltage', 'timestamps', 'spread'))
+# Monotonic times at which each value of a State was received
+StateTimestamps = namedtuple('StateTimestamps', ('attitude', 'velocities', 'motors', 'voltage'))
 
 class Mosquito(MosquitoComms):
 	"""
@@ -24,44 +44,38 @@ class Mosquito(MosquitoComms):
 		- http://www.multiwii.com/wiki/index.php?title=Multiwii_Serial_Protocol
 	"""
 
-	def __init__(self):
+	def __init__(self, *args, **kwargs):
 		"""
 		Initialize the API instance and create
 		a WiFi communication channel between laptop
-		and Mosquito
-		"""
-		super(Mosquito, self).__init__()
-
-		# Create subscribers, which will be used in our public get methods to retrieve
-		# the requested values. A subscriber will be notified when its respective publisher
-		# is called.
-		self.__position_board_connected_sub = Subscriber()
-		self.__firmware_version_sub = Subscriber()
-		self.__attitude_sub = Subscriber()
-		self.__velocities_sub = Subscriber()
-		self.__motors_sub = Subscriber()
-		self.__voltage_sub = Subscriber()
-		self.__PID_sub = Subscriber()
-		# Create publishers. The publishers will be set as the handlers of the MSP
-		# messages. This way, they will be called when the appropriate MSP message
-		# is received. When this happens, the publisher will notify its subscriber
-		# and deliver the new value
-		self.__position_board_connected_pub = publisher(self.__position_board_connected_sub)
-		self.__firmware_version_pub = publisher(self.__firmware_version_sub)
-		self.__attitude_pub = publisher(self.__attitude_sub)
-		self.__velocities_pub = publisher(self.__velocities_sub)
-		self.__motors_pub = publisher(self.__motors_sub)
-		self.__voltage_pub = publisher(self.__voltage_sub)
-		self.__PID_pub = publisher(self.__PID_sub)
-		# Set the publishers as the MSP message handlers
-		# They will be triggered when the appropriate message is received
-		self._parser.set_POSITION_BOARD_CONNECTED_Handler(self.__position_board_connected_pub)
-		self._parser.set_FIRMWARE_VERSION_Handler(self.__firmware_version_pub)
-		self._parser.set_ATTITUDE_RADIANS_Handler(self.__attitude_pub)
-		self._parser.set_GET_VELOCITIES_Handler(self.__velocities_pub)
-		self._parser.set_GET_MOTOR_NORMAL_Handler(self.__motors_pub)
-		self._parser.set_GET_BATTERY_VOLTAGE_Handler(self.__voltage_pub)
-		self._parser.set_GET_PID_CONSTANTS_Handler(self.__PID_pub)
+		and Mosquito. Arguments, if any, are the connection
+		settings of MosquitoComms (address, port, timeout,
+		read_size, receive_buffer_size and reactor)
+		"""
+		super(Mosquito, self).__init__(*args, **kwargs)
+
+		# Requests waiting for a reply. Every request gets a future that is
+		# completed when its reply arrives, so several requests can be in flight
+		self.__replies = PendingReplies()
+		# Set the publishers of the pending requests table as the MSP message handlers.
+		# They will be triggered when the appropriate message is received.
+		# Messages are delivered as lazy views, so replies are only
+		# unpacked when read
+		self._parser.set_POSITION_BOARD_CONNECTED_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['POSITION_BOARD_CONNECTED']), lazy=True)
+		self._parser.set_FIRMWARE_VERSION_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['FIRMWARE_VERSION']), lazy=True)
+		self._parser.set_ATTITUDE_RADIANS_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['ATTITUDE_RADIANS']), lazy=True)
+		self._parser.set_GET_VELOCITIES_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['GET_VELOCITIES']), lazy=True)
+		self._parser.set_GET_MOTOR_NORMAL_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['GET_MOTOR_NORMAL']), lazy=True)
+		self._parser.set_GET_BATTERY_VOLTAGE_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['GET_BATTERY_VOLTAGE']), lazy=True)
+		self._parser.set_GET_PID_CONSTANTS_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['GET_PID_CONSTANTS']), lazy=True)
+		self._parser.set_RC_NORMAL_Handler(self.__replies.publisher(msppg.MESSAGE_IDS['RC_NORMAL']), lazy=True)
+		# Requests sent periodically
+		# Scheduled requests are registered like the ones of the getters,
+		# so that their replies do not complete the requests of the getters
+		self.__scheduler = TelemetryScheduler(self.__request_replies)
+		# Streams of motor values and of RC channels, if any
+		self.__motors_stream = None
+		self.__RC_stream = None
 		# Mosquito's status attributes
 		self.__motor_values = tuple([0]*4)
 		self.__led_status = tuple([0]*3)
@@ -69,81 +83,368 @@ class Mosquito(MosquitoComms):
 		# Mosquito's PID constants
 		self.__controller_constants = tuple([0]*19)
 
+	def __request_replies(self, names, max_age=None):
+		"""
+		Send request messages without waiting for their replies. Every request
+		is sent with a single write, straight away even inside a batch. If a request of the same message is already
+		waiting for its reply, no new request is sent and its reply is shared.
+		The same happens if a recent enough reply has already been received
+
+		:param names: names of the requested messages
+		:type names: list
+		:param max_age: maximum age in seconds of a previously received reply to be returned
+		instead of sending a request. If None, a request is always sent
+		:type max_age: float
+		:return: futures completed with the replies, in the same order as the names
+		:rtype: list
+		"""
+		replies = []
+		requests = []
+		for name in names:
+			message_id = msppg.MESSAGE_IDS[name]
+			# Callers asking for a message whose request is still pending share its reply
+			future, new = self.__replies.add(message_id, max_age=max_age)
+			replies.append(future)
+			if new:
+				requests.append((message_id, future))
+		if requests:
+			try:
+				self._send_requests(b''.join(msppg.REQUEST_FRAMES[message_id] for message_id, _ in requests))
+			except Exception as e:
+				for message_id, future in requests:
+					self.__replies.discard(message_id, future, e)
+				raise
+		return replies
+
+	def __request(self, telemetry, max_age=None):
+		"""
+		Send the request message of a value without waiting for its reply
+
+		:param telemetry: requested value, as a key of _TELEMETRY
+		:type telemetry: string
+		:param max_age: maximum age in seconds of a previously received reply to be returned
+		instead of sending a request. If None, a request is always sent
+		:type max_age: float
+		:return: future completed with the returned value
+		:rtype: concurrent.futures.Future
+		"""
+		message, transform = _TELEMETRY[telemetry]
+		future, = self.__request_replies([message], max_age)
+		return chain(future, lambda reply: transform(reply.record))
+
 	# Public methods
-	def position_board_connected(self):
+	def disconnect(self):
+		"""
+		Disconnect from the Mosquito. Scheduled values and streams
+		are stopped, and requests still waiting for a reply fail
+		with a ConnectionError
+
+		:return: None
+		:rtype:None
+		"""
+		self.unschedule()
+		self.__scheduler.clear()
+		# Streams are stopped while connected, so that the
+		# Mosquito is told when the virtual transmitter stops
+		for stream in (self.__motors_stream, self.__RC_stream):
+			if stream is not None:
+				stream.stop()
+		self.__motors_stream = self.__RC_stream = None
+		super(Mosquito, self).disconnect()
+		self.__replies.fail_all(ConnectionError('Disconnected from the Mosquito'))
+
+	def position_board_connected_async(self, max_age=None):
+		"""
+		Check if the position board is connected to the Mosquito
+		without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the status of the position board
+		:rtype: concurrent.futures.Future
+		"""
+		return self.__request('position_board_connected', max_age)
+
+	def position_board_connected(self, max_age=None):
 		"""
 		Check if the position board is connected to the Mosquito.
 
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: The status of the position board. True if connected and False otherwise
 		:rtype: bool
 		"""
-		self._send_data(msppg.serialize_POSITION_BOARD_CONNECTED_Request())
-		return bool(self.__position_board_connected_sub.get_value())
+		return self.__replies.wait(self.position_board_connected_async(max_age))
+
+	def get_firmware_version_async(self, max_age=None):
+		"""
+		Get the version of the firmware running on the Mosquito
+		without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the firmware version
+		:rtype: concurrent.futures.Future
+		"""
+		return self.__request('firmware_version', max_age)
 
-	def get_firmware_version(self):
+	def get_firmware_version(self, max_age=None):
 		"""
 		Get the version of the firmware running on the Mosquito
 
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: Firmware version
 		:rtype: int
 		"""
-		self._send_data(msppg.serialize_FIRMWARE_VERSION_Request())
-		return self.__firmware_version_sub.get_value()[0]
+		return self.__replies.wait(self.get_firmware_version_async(max_age))
 
-	def get_attitude(self, degrees=False):
+	def get_attitude_async(self, degrees=False, max_age=None):
 		"""
-		Get the orientation of the Mosquito
+		Get the orientation of the Mosquito without waiting for the reply
 
-		:return: Orientation of the Mosquito in radians
-		:rtype: tuple
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the orientation of the Mosquito
+		:rtype: concurrent.futures.Future
 		"""
-		self._send_data(msppg.serialize_ATTITUDE_RADIANS_Request())
-		attitude = self.__attitude_sub.get_value()
+		future = self.__request('attitude', max_age)
 		if not degrees:
-			return attitude
-		return tuple([angle*180/math.pi for angle in attitude])
+			return future
+		return chain(future, lambda attitude: attitude._make([angle*180/math.pi for angle in attitude]))
 
-	def get_velocities(self):
+	def get_attitude(self, degrees=False, max_age=None):
+		"""
+		Get the orientation of the Mosquito
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Orientation of the Mosquito in radians, as roll, pitch and yaw
+		:rtype: namedtuple
+		"""
+		return self.__replies.wait(self.get_attitude_async(degrees, max_age))
+
+	def get_velocities_async(self, max_age=None):
+		"""
+		Get the linear velocities of the Mosquito without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the linear velocities of the Mosquito
+		:rtype: concurrent.futures.Future
+		"""
+		return self.__request('velocities', max_age)
+
+	def get_velocities(self, max_age=None):
 		"""
 		Get the linear velocities of the Mosquito
 
-		:return: Linear velocities of the Mosquito in meters per second
-		:rtype: tuple
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: Linear velocities of the Mosquito in meters per second, as velx, vely and velz
+		:rtype: namedtuple
+		"""
+		return self.__replies.wait(self.get_velocities_async(max_age))
+
+	def get_voltage_async(self, max_age=None):
+		"""
+		Get the voltage of the battery in the Mosquito
+		without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the battery voltage
+		:rtype: concurrent.futures.Future
 		"""
-		self._send_data(msppg.serialize_GET_VELOCITIES_Request())
-		return self.__velocities_sub.get_value()
+		return self.__request('voltage', max_age)
 
-	def get_voltage(self):
+	def get_voltage(self, max_age=None):
 		"""
 		Get the voltage of the battery in the Mosquito. 
 		If not connected it returns 0.0
 
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: Battery voltage in V
 		:rtype: float
 		"""
-		self._send_data(msppg.serialize_GET_BATTERY_VOLTAGE_Request())
-		return self.__voltage_sub.get_value()[0]
+		return self.__replies.wait(self.get_voltage_async(max_age))
+
+	def get_motors_async(self, max_age=None):
+		"""
+		Get the values of all motors without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the current motor values
+		:rtype: concurrent.futures.Future
+		"""
+		return self.__request('motors', max_age)
 
-	def get_motors(self):
+	def get_motors(self, max_age=None):
 		"""
 		Get the values of all motors
 
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: current motor values in the range 0-1. The values are ordered
-		so that the position in the tuple matches the motor index
-		:trype: tuple
+		so that the position in the tuple matches the motor index (fields m1 to m4)
+		:trype: namedtuple
+		"""
+		return self.__replies.wait(self.get_motors_async(max_age))
+
+	def get_PID_async(self, max_age=None):
+		"""
+		Get the constants of every PID controller in Hackflight
+		without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the current values for PID controllers
+		:rtype: concurrent.futures.Future
 		"""
-		self._send_data(msppg.serialize_GET_MOTOR_NORMAL_Request())
-		return self.__motors_sub.get_value()
+		return self.__request('PID', max_age)
 
-	def get_PID(self):
+	def get_PID(self, max_age=None):
 		"""
 		Get the constants of every PID controller in Hackflight.
 
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: current values for PID controllers. See 'set_PID()' documentation for tuple details
-		:trype: tuple
+		:trype: namedtuple
+		"""
+		return self.__replies.wait(self.get_PID_async(max_age))
+
+	def get_RC_async(self, max_age=None):
+		"""
+		Get the values of the RC channels received by the Mosquito
+		without waiting for the reply
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the values of the RC channels
+		:rtype: concurrent.futures.Future
+		"""
+		return self.__request('RC', max_age)
+
+	def get_RC(self, max_age=None):
+		"""
+		Get the values of the RC channels received by the Mosquito,
+		either from the transmitter or from set_RC()
+
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: values of the 6 RC channels in the range -1 to 1 (fields c1 to c6)
+		:rtype: namedtuple
+		"""
+		return self.__replies.wait(self.get_RC_async(max_age))
+
+	def get_state_async(self, degrees=False, max_age=None):
+		"""
+		Get the attitude, linear velocities, motor values and battery voltage of
+		the Mosquito without waiting for the replies. The four requests are sent
+		with a single write, so their replies arrive at about the same time
+
+		:param degrees: get the attitude in degrees instead of radians
+		:type degrees: bool
+		:param max_age: maximum age in seconds of previously received values to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the state of the Mosquito
+		:rtype: concurrent.futures.Future
+		"""
+		names = ('attitude', 'velocities', 'motors', 'voltage')
+		replies = self.__request_replies([_TELEMETRY[name][0] for name in names], max_age)
+		def to_state(replies):
+			values = [_TELEMETRY[name][1](reply.record) for name, reply in zip(names, replies)]
+			if degrees:
+				values[0] = values[0]._make([angle*180/math.pi for angle in values[0]])
+			timestamps = StateTimestamps._make(reply.timestamp for reply in replies)
+			return State(*values, timestamps=timestamps, spread=max(timestamps) - min(timestamps))
+		return gather(replies, to_state)
+
+	def get_state(self, degrees=False, max_age=None):
+		"""
+		Get the attitude, linear velocities, motor values and battery voltage of
+		the Mosquito. The four requests are sent with a single write, so the state
+		takes a single round trip and its values are close in time
+
+		:param degrees: get the attitude in degrees instead of radians
+		:type degrees: bool
+		:param max_age: maximum age in seconds of previously received values to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: attitude, velocities, motors and voltage as returned by their getters, the
+		monotonic times at which each of them was received (timestamps) and the difference
+		in seconds between the first and the last of them (spread)
+		:rtype: namedtuple
+		"""
+		return self.__replies.wait(self.get_state_async(degrees, max_age))
+
+	def schedule(self, telemetry, rate, callback=None):
+		"""
+		Request a value periodically. Every value requested at the same time
+		is sent with a single write. The received values can be read with the
+		getters and the max_age parameter, or handled as they arrive by a callback.
+		If the value was already scheduled, its rate and callback are replaced.
+		If sending the requests failed for any reason other than not being
+		connected, every value stopped being requested and the error is raised
+
+		:param telemetry: value to request. One of 'attitude', 'velocities', 'motors',
+		'voltage', 'PID', 'RC', 'firmware_version' or 'position_board_connected'
+		:type telemetry: string
+		:param rate: number of requests per second
+		:type rate: float
+		:param callback: function called with every received value, from the
+		thread that receives the data. If None, no function is called
+		:type callback: callable
+		:return: None
+		:rtype: None
+		"""
+		error = self.__scheduler.error
+		if error is not None:
+			self.__scheduler.clear()
+			raise error
+		if telemetry not in _TELEMETRY:
+			raise ValueError('Unknown telemetry {}, expected one of: {}'.format(telemetry, ', '.join(_TELEMETRY)))
+		message, transform = _TELEMETRY[telemetry]
+		message_id = msppg.MESSAGE_IDS[message]
+		if callback is None:
+			self.__replies.subscribe(message_id, None)
+		else:
+			self.__replies.subscribe(message_id, lambda reply: callback(transform(reply.record)))
+		self.__scheduler.add(telemetry, message, rate)
+
+	def unschedule(self, telemetry=None):
+		"""
+		Stop requesting a value periodically
+
+		:param telemetry: value to stop requesting. If None, every scheduled value is stopped
+		:type telemetry: string
+		:return: None
+		:rtype: None
 		"""
-		self._send_data(msppg.serialize_GET_PID_CONSTANTS_Request())
-		return self.__PID_sub.get_value()
+		telemetries = list(_TELEMETRY) if telemetry is None else [telemetry]
+		for telemetry in telemetries:
+			self.__scheduler.remove(telemetry)
+			self.__replies.subscribe(msppg.MESSAGE_IDS[_TELEMETRY[telemetry][0]], None)
 
 	def arm(self):
 		"""
@@ -152,16 +453,20 @@ class Mosquito(MosquitoComms):
 		:return: None
 		:rtype: None
 		"""
-		self._send_data(msppg.serialize_WP_ARM_Request())
+		self._send_data(msppg.REQUEST_FRAMES['WP_ARM'])
 
 	def disarm(self):
 		"""
-		Disarm the Mosquito
+		Disarm the Mosquito. The message is sent before any other message
+		waiting to be sent, and the commands and motor and RC channel values
+		waiting to be sent (including the ones of the current batch) are dropped
 
 		:return: None
 		:rtype: None
 		"""
-		self._send_data(msppg.serialize_WP_DISARM_Request())
+		self._send_data(msppg.REQUEST_FRAMES['WP_DISARM'], PRIORITY_URGENT)
+		# Motor values waiting to be sent are dropped
+		self.__motor_values = tuple([0]*4)
 
 	def set_position_board(self, has_position_board):
 		"""
@@ -236,8 +541,69 @@ class Mosquito(MosquitoComms):
 		:return: None
 		:trype: None
 		"""
+		# If the previous motor values have not been sent yet they are replaced
+		self._send_setpoint('SET_MOTOR_NORMAL', *values)
 		self.__motor_values = values
-		self._send_data(msppg.serialize_SET_MOTOR_NORMAL(*values))
+
+	def stream_motors(self, source, rate=200):
+		"""
+		Set the values of all motors at a fixed rate from a different thread.
+		Any stream of motor values already running is stopped first
+
+		:param source: function called without arguments every tick that returns the
+		4 motor values (see 'set_motors()'), or iterator of motor values. If the values
+		are None, no values are sent that tick. The stream stops when the iterator is exhausted
+		:type source: callable or iterator
+		:param rate: number of times per second the motor values are set
+		:type rate: float
+		:return: stream whose stop() method stops it and whose stats attribute
+		holds the achieved rate and jitter histograms
+		:rtype: SetpointStream
+		"""
+		if self.__motors_stream is not None:
+			self.__motors_stream.stop()
+		self.__motors_stream = SetpointStream(self.set_motors, source, rate)
+		return self.__motors_stream
+
+	def set_RC(self, channels):
+		"""
+		Set the values of the RC channels, as if they were sent by a
+		transmitter. If the previous values are still waiting to be
+		sent they are replaced by the new ones
+
+		:param channels: 6 value list with the values of the channels in the range -1 to 1.
+		In Hackflight's order: throttle, roll, pitch, yaw, aux 1 and aux 2
+		:type channels: list
+		:return: None
+		:rtype: None
+		"""
+		self._send_setpoint('SET_RC_NORMAL', *channels)
+
+	def stream_RC(self, source, rate=100):
+		"""
+		Set the values of the RC channels at a fixed rate from a different thread,
+		acting as a virtual transmitter. When the stream stops, the Mosquito is told
+		that the signal of the transmitter has been lost. Any stream of RC channels
+		already running is replaced, without telling the Mosquito that the signal
+		has been lost
+
+		:param source: function called without arguments every tick that returns the
+		6 channel values (see 'set_RC()'), or iterator of channel values. If the values
+		are None, no values are sent that tick. The stream stops when the iterator is exhausted
+		:type source: callable or iterator
+		:param rate: number of times per second the channel values are set
+		:type rate: float
+		:return: stream whose stop() method stops it and whose stats attribute
+		holds the achieved rate and jitter histograms
+		:rtype: SetpointStream
+		"""
+		if self.__RC_stream is not None:
+			self.__RC_stream.stop(call_on_stop=False)
+		# The lost signal is queued like any other message, so that commands
+		# sent before the stream stops are not dropped
+		self.__RC_stream = SetpointStream(self.set_RC, source, rate,
+			lambda: self._send_data(msppg.serialize_LOST_SIGNAL(1)))
+		return self.__RC_stream
 
 	def set_voltage(self, voltage):
 		"""
@@ -254,17 +620,33 @@ class Mosquito(MosquitoComms):
 		self.__voltage = voltage
 		self._send_data(msppg.serialize_SET_BATTERY_VOLTAGE(voltage))
 
-	def get_motor(self, motor):
+	def get_motor_async(self, motor, max_age=None):
+		"""
+		Get the value of a specific motor without waiting for the reply
+
+		:param motor: Motor number whose value is wanted
+		:type motor: int
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
+		:return: future completed with the current motor value
+		:rtype: concurrent.futures.Future
+		"""
+		return chain(self.get_motors_async(max_age), lambda motor_values: motor_values[motor-1])
+
+	def get_motor(self, motor, max_age=None):
 		"""
 		Get the value of a specific motors
 
 		:param motor: Motor number whose value is wanted
 		:type motor: int
+		:param max_age: maximum age in seconds of a previously received value to be
+		returned instead of asking the Mosquito. If None, the Mosquito is always asked
+		:type max_age: float
 		:return: current motor value in the range 0-1
 		:trype: float
 		"""
-		motor_values = self.get_motors()
-		return motor_values[motor-1]
+		return self.__replies.wait(self.get_motor_async(motor, max_age))
 
 	def set_PID(self, gyro_roll_P, gyro_roll_I, gyro_roll_D, gyro_pitch_P, gyro_pitch_I, gyro_pitch_D,
 		gyro_yaw_P, gyro_yaw_I, demands_to_rate, level_P, altHold_P, altHold_vel_P, altHold_vel_I,
@@ -330,8 +712,9 @@ class Mosquito(MosquitoComms):
 		:return: None
 		:rtype: None
 		"""
-		self.__led_status = tuple([self.__led_status[idx] if value is None else value for idx, value in enumerate([red, green, blue])])
-		self._send_data(msppg.serialize_SET_LEDS(*self.__led_status))
+		led_status = tuple([self.__led_status[idx] if value is None else value for idx, value in enumerate([red, green, blue])])
+		self._send_setpoint('SET_LEDS', *led_status)
+		self.__led_status = led_status
 
 	def clear_EEPROM(self, section):
 		"""
@@ -347,12 +730,16 @@ class Mosquito(MosquitoComms):
 	def stop(self):
 		"""
 		Trigger an emergency stop that will hault the Mosquito and stop any action
-		being performed
+		being performed. The message is sent before any other message waiting
+		to be sent, and the commands and motor and RC channel values waiting to
+		be sent (including the ones of the current batch) are dropped
 
 		:return: None
 		:rtype: None
 		"""
-		self._send_data(msppg.serialize_SET_EMERGENCY_STOP(0))
+		self._send_data(msppg.serialize_SET_EMERGENCY_STOP(0), PRIORITY_URGENT)
+		# Motor values waiting to be sent are dropped
+		self.__motor_values = tuple([0]*4)
 
 	def execute_mission(self):
 		"""
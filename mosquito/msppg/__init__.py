@@ -1,7 +1,10 @@
 '''
 __init__.py Python implementation of MSPPG parser
 
-Auto-generated code: DO NOT EDIT!
+Message definitions are kept as data in a single table. Serializers,
+handler setters and the named tuples holding the fields of each message
+(e.g. msppg.ATTITUDE_RADIANS) are generated from it the first time they
+are accessed, so that only the codecs actually used are ever built.
 
 Copyright (C) Rob Jones, Alec Singer, Chris Lavin, Blake Liebling, Simon D. Levy 2015
 
@@ -21,18 +24,300 @@ You should have received a copy of the GNU Lesser General Public License
 along with this code.  If not, see <http:#www.gnu.org/licenses/>.
 '''
 
+import re
 import struct
-import sys
-
-def _CRC8(data):
-
-    crc = 0x00
-   
-    for c in data:
-
-        crc ^= ord(c) if sys.version[0] == '2' else c
-
-    return crc
+from collections import namedtuple
+from types import MappingProxyType
+
+from mosquito.msppg.crc import crc8, verify_frames
+from mosquito.msppg.stats import ParserStats, CRC_FAILURE, UNKNOWN_ID, OVERSIZED, UNDERSIZED, HANDLER_ERROR, RESYNC
+
+# Every MSP message, as (name, message ID, direction, payload format, fields).
+# Messages with direction '>' are sent by the Mosquito upon request, and
+# messages with direction '<' are commands sent to the Mosquito
+_MESSAGES = (
+    ('RAW_IMU', 102, '>', 'hhhhhhhhh', 'accx accy accz gyrx gyry gyrz magx magy magz'),
+    ('GET_VELOCITIES', 103, '>', 'fff', 'velx vely velz'),
+    ('RC_NORMAL', 121, '>', 'ffffff', 'c1 c2 c3 c4 c5 c6'),
+    ('SET_RC_NORMAL', 222, '<', 'ffffff', 'c1 c2 c3 c4 c5 c6'),
+    ('LOST_SIGNAL', 226, '<', 'B', 'flag'),
+    ('ATTITUDE_RADIANS', 122, '>', 'fff', 'roll pitch yaw'),
+    ('ALTITUDE_METERS', 123, '>', 'ff', 'estalt vario'),
+    ('LOITER', 126, '>', 'fff', 'agl flowx flowy'),
+    ('SET_ARMED', 216, '<', 'B', 'flag'),
+    ('FAKE_INT', 199, '>', 'ii', 'value1 value2'),
+    ('SET_MOTOR_NORMAL', 215, '<', 'ffff', 'm1 m2 m3 m4'),
+    ('GET_MOTOR_NORMAL', 124, '>', 'ffff', 'm1 m2 m3 m4'),
+    ('WP_ARM', 1, '>', 'B', 'code'),
+    ('WP_DISARM', 2, '>', 'B', 'code'),
+    ('WP_LAND', 3, '>', 'B', 'code'),
+    ('WP_TAKE_OFF', 4, '>', 'BB', 'meters code'),
+    ('WP_GO_FORWARD', 5, '>', 'BB', 'meters code'),
+    ('WP_GO_BACKWARD', 6, '>', 'BB', 'meters code'),
+    ('WP_GO_LEFT', 7, '>', 'BB', 'meters code'),
+    ('WP_GO_RIGHT', 8, '>', 'BB', 'meters code'),
+    ('WP_CHANGE_ALTITUDE', 9, '>', 'BB', 'meters code'),
+    ('WP_CHANGE_SPEED', 10, '>', 'BB', 'speed code'),
+    ('WP_HOVER', 11, '>', 'BB', 'seconds code'),
+    ('WP_TURN_CW', 12, '>', 'BB', 'degrees code'),
+    ('WP_TURN_CCW', 13, '>', 'BB', 'degrees code'),
+    ('WP_MISSION_FLAG', 23, '>', 'B', 'flag'),
+    ('ESC_CALIBRATION', 24, '>', 'B', 'protocol'),
+    ('MOSQUITO_VERSION', 25, '>', 'B', 'mosquitoVersion'),
+    ('POSITION_BOARD', 26, '>', 'B', 'hasPositionBoard'),
+    ('POSITION_BOARD_CONNECTED', 27, '>', 'B', 'positionBoardConnected'),
+    ('WP_MISSION_BEGIN', 30, '>', 'B', 'flag'),
+    ('FIRMWARE_VERSION', 50, '>', 'B', 'version'),
+    ('SET_MOSQUITO_VERSION', 223, '<', 'B', 'version'),
+    ('SET_PID_CONSTANTS', 224, '<', 'fffffffffffffffffff', 'gyroRollP gyroRollI gyroRollD gyroPitchP gyroPitchI gyroPitchD gyroYawP gyroYawI demandsToRate levelP altHoldP altHoldVelP altHoldVelI altHoldVelD minAltitude param6 param7 param8 param9'),
+    ('GET_PID_CONSTANTS', 127, '>', 'fffffffffffffffffff', 'gyroRollP gyroRollI gyroRollD gyroPitchP gyroPitchI gyroPitchD gyroYawP gyroYawI demandsToRate levelP altHoldP altHoldVelP altHoldVelI altHoldVelD minAltitude param6 param7 param8 param9'),
+    ('SET_POSITIONING_BOARD', 225, '<', 'B', 'hasBoard'),
+    ('SET_LEDS', 227, '<', 'BBB', 'red green blue'),
+    ('RC_CALIBRATION', 214, '<', 'B', 'stage'),
+    ('RC_CALIBRATION_STATUS', 119, '>', 'B', 'status'),
+    ('SET_BATTERY_VOLTAGE', 228, '<', 'f', 'batteryVoltage'),
+    ('SET_EMERGENCY_STOP', 229, '<', 'B', 'flag'),
+    ('GET_BATTERY_VOLTAGE', 125, '>', 'f', 'voltage'),
+    ('GET_MISSION_COMPLETE', 116, '>', 'B', 'status'),
+    ('SET_RANGE_PARAMETERS', 221, '<', 'fff', 'rx ry rz'),
+    ('CLEAR_EEPROM', 201, '<', 'B', 'section'),
+)
+
+_MESSAGES_BY_NAME = dict((message[0], message) for message in _MESSAGES)
+_MESSAGE_IDS = frozenset(message[1] for message in _MESSAGES)
+
+# ID of every message, indexed by message name
+MESSAGE_IDS = MappingProxyType(dict((message[0], message[1]) for message in _MESSAGES))
+
+# MSP v1 encodes the payload length in a single byte
+MAX_PAYLOAD_LENGTH = 255
+
+# Bytes before the payload ($, M, direction, length and ID)
+_HEADER_LENGTH = 5
+
+# Largest payload a message ID can carry. Longer payloads are rejected as
+# corrupt. Unknown IDs are bounded by the largest payload of any message
+_MAX_LENGTHS = [0] * 256
+for _, _message_id, _, _format, _ in _MESSAGES:
+    _MAX_LENGTHS[_message_id] = struct.calcsize('<' + _format)
+_MAX_LENGTHS = [length if message_id in _MESSAGE_IDS else max(_MAX_LENGTHS)
+                for message_id, length in enumerate(_MAX_LENGTHS)]
+
+# Start of every MSP message. A regular expression is used instead of
+# find() so that memoryview chunks can be searched without copying them
+_SYNC = re.compile(b'\\$M')
+
+def _request_frame(message_id):
+    # A request has no payload, so its checksum is the message ID itself
+    return bytes([ord('$'), ord('M'), ord('<'), 0, message_id, message_id])
+
+# Requests carry no payload, so their frames are constant. They are built
+# once at import and can be looked up either by message name or by ID
+_request_frames = {}
+for _name, _message_id, _direction, _, _ in _MESSAGES:
+    if _direction == '>':
+        _request_frames[_name] = _request_frames[_message_id] = _request_frame(_message_id)
+REQUEST_FRAMES = MappingProxyType(_request_frames)
+
+# Codecs and records built so far, indexed by message name
+_payload_structs = {}
+_frame_structs = {}
+_records = {}
+_views = {}
+
+def _message(name):
+    try:
+        return _MESSAGES_BY_NAME[name]
+    except KeyError:
+        raise AttributeError('Unknown MSP message: {}'.format(name))
+
+def _payload_struct(name):
+    # Unpacker of the payload of a message
+    payload_struct = _payload_structs.get(name)
+    if payload_struct is None:
+        payload_struct = _payload_structs[name] = struct.Struct('<' + _message(name)[3])
+    return payload_struct
+
+def _frame_struct(name):
+    # Header, payload length and message ID followed by the payload
+    frame_struct = _frame_structs.get(name)
+    if frame_struct is None:
+        frame_struct = _frame_structs[name] = struct.Struct('<3sBB' + _message(name)[3])
+    return frame_struct
+
+def _record(name):
+    # Named tuple holding the fields of a message
+    record = _records.get(name)
+    if record is None:
+        record = _records[name] = namedtuple(name, _message(name)[4])
+        record.__module__ = __name__
+    return record
+
+class FrameView(object):
+    '''
+    Lightweight view of a received message that keeps its raw payload and
+    only unpacks it the first time one of its fields is accessed. Fields
+    can be read by name, by index or all at once as a record with unpack().
+    '''
+
+    __slots__ = ('payload', '_record')
+
+    # Set by the view class of every message
+    _struct = None
+    _make = None
+
+    def __init__(self, payload):
+        self.payload = payload
+        self._record = None
+
+    def unpack(self):
+        '''
+        Returns the record holding the fields of the message, unpacking
+        the payload if it has not been unpacked yet.
+        '''
+        record = self._record
+        if record is None:
+            record = self._record = self._make(self._struct.unpack(self.payload))
+        return record
+
+    def __getitem__(self, index):
+        return self.unpack()[index]
+
+    def __iter__(self):
+        return iter(self.unpack())
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.payload)
+
+def _field(index):
+    return property(lambda self: self.unpack()[index])
+
+def _view(name):
+    # FrameView subclass with a property for every field of a message
+    view = _views.get(name)
+    if view is None:
+        record = _record(name)
+        attributes = dict((field, _field(index)) for index, field in enumerate(record._fields))
+        attributes.update(__slots__=(), _struct=_payload_struct(name), _make=record._make)
+        view = _views[name] = type(name + 'View', (FrameView,), attributes)
+        view.__module__ = __name__
+    return view
+
+def _close_frame(buffer, offset, size):
+    # Append the checksum of the length, ID and payload of a packed frame
+    end = offset + size
+    buffer[end] = crc8(memoryview(buffer)[offset + 3:end])
+    return end + 1
+
+def _make_serializer_into(name):
+    _, message_id, _, _, fields = _message(name)
+    frame_struct = _frame_struct(name)
+    size = frame_struct.size
+    pack_into = frame_struct.pack_into
+    length = size - 5
+
+    def serializer_into(buffer, offset, *values):
+        pack_into(buffer, offset, b'$M<', length, message_id, *values)
+        return _close_frame(buffer, offset, size)
+
+    serializer_into.__doc__ = '''
+    Serializes a message of type {} into a writable buffer, starting at
+    offset. Returns the offset right after the serialized message.
+    Parameter(s) after offset: {}
+    '''.format(name, ', '.join(fields.split()))
+    return serializer_into
+
+def _make_serializer(name):
+    frame_size = _frame_struct(name).size + 1
+    serializer_into = _make_serializer_into(name)
+
+    def serializer(*values):
+        buffer = bytearray(frame_size)
+        serializer_into(buffer, 0, *values)
+        return bytes(buffer)
+
+    serializer.__doc__ = '''
+    Serializes the contents of a message of type {}.
+    Parameter(s): {}
+    '''.format(name, ', '.join(_message(name)[4].split()))
+    return serializer
+
+def _make_request_serializer(name):
+    if _message(name)[2] != '>':
+        raise AttributeError('MSP message {} cannot be requested'.format(name))
+    frame = REQUEST_FRAMES[name]
+
+    def request_serializer():
+        return frame
+
+    request_serializer.__doc__ = '''
+    Serializes a request for {} data.
+    '''.format(name)
+    return request_serializer
+
+def _make_handler_setter(name):
+    _, message_id, direction, _, fields = _message(name)
+    if direction != '>':
+        raise AttributeError('MSP message {} is never received'.format(name))
+    payload_struct = _payload_struct(name)
+    attribute = name + '_Handler'
+
+    def set_handler(self, handler, record=False, lazy=False):
+        setattr(self, attribute, handler)
+        self._dispatch[(message_id, 1)] = (payload_struct, handler,
+                                           _record(name)._make if record else None,
+                                           _view(name) if lazy else None)
+
+    set_handler.__doc__ = '''
+        Sets the handler method for when a {0} message is successfully parsed.
+        You should declare this message with the following parameter(s):
+            {1}
+        If record is True the handler is instead called with a single
+        {0} named tuple holding those fields. If lazy is True it is called
+        with a FrameView whose payload is only unpacked when a field is read.
+        '''.format(name, ','.join(fields.split()))
+    return set_handler
+
+def _generated(name, prefix, suffix):
+    # Name of the message a generated function is for, or None
+    if name.startswith(prefix) and name.endswith(suffix) and len(name) > len(prefix) + len(suffix):
+        return name[len(prefix):len(name) - len(suffix)]
+    return None
+
+def __getattr__(name):
+    '''
+    Generates the serialize_<NAME>, serialize_<NAME>_into and
+    serialize_<NAME>_Request functions, as well as the <NAME> record
+    classes, the first time they are accessed.
+    '''
+    if name in _MESSAGES_BY_NAME:
+        record = globals()[name] = _record(name)
+        return record
+    message = _generated(name, 'serialize_', '_Request')
+    if message is not None and message in _MESSAGES_BY_NAME:
+        function = _make_request_serializer(message)
+    else:
+        message = _generated(name, 'serialize_', '_into')
+        if message is not None and message in _MESSAGES_BY_NAME:
+            function = _make_serializer_into(message)
+        else:
+            message = _generated(name, 'serialize_', '')
+            if message is None or message not in _MESSAGES_BY_NAME:
+                raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+            function = _make_serializer(message)
+    function.__name__ = function.__qualname__ = name
+    function.__module__ = __name__
+    # Cache the function so that this hook is not called again for it
+    globals()[name] = function
+    return function
+
+def __dir__():
+    names = list(globals())
+    for name, _, direction, _, _ in _MESSAGES:
+        names += [name, 'serialize_' + name, 'serialize_' + name + '_into']
+        if direction == '>':
+            names.append('serialize_' + name + '_Request')
+    return sorted(set(names))
 
 class MSP_Parser(object):
 
@@ -40,1689 +325,186 @@ class MSP_Parser(object):
 
         self.state = 0
 
-    def parse(self, char):
-        '''
-        Parses one character, triggering pre-set handlers upon a successful parse.
-        '''
-
-        byte = ord(char)
-
-        if self.state ==  0: # sync char 1
-            if byte == 36: # $
-                self.state += 1
-
-        elif self.state ==  1: # sync char 2
-            if byte == 77: # M
-                self.state += 1
-            else: # restart and try again
-                self.state = 0
-
-        elif self.state ==  2: # direction
-            if byte == 62:  # >
-                self.message_direction = 1
-            else: # <
-                self.message_direction = 0
-            self.state += 1
-            
-        elif self.state ==  3:
-            self.message_length_expected = byte
-            self.message_checksum = byte
-            # setup arraybuffer
-            self.message_buffer = b''
-            self.state += 1
-
-        elif self.state ==  4:
-            self.message_id = byte
-            self.message_length_received  = 0
-            self.message_checksum ^= byte
-            if self.message_length_expected > 0:
-                # process payload
-                self.state += 1
-            else:
-                # no payload
-                self.state += 2
-
-        elif self.state ==  5: # payload
-            self.message_buffer += char
-            self.message_checksum ^= byte
-            self.message_length_received += 1
-            if self.message_length_received >= self.message_length_expected:
-                self.state += 1
-
-        elif self.state ==  6:
-            if self.message_checksum == byte:
-                # message received, process
-
-                if self.message_id == 102:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'RAW_IMU_Request_Handler'):
-
-                            self.RAW_IMU_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'RAW_IMU_Handler'):
-
-                            self.RAW_IMU_Handler(*struct.unpack('=hhhhhhhhh', self.message_buffer))
-
-                if self.message_id == 103:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'GET_VELOCITIES_Request_Handler'):
-
-                            self.GET_VELOCITIES_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'GET_VELOCITIES_Handler'):
-
-                            self.GET_VELOCITIES_Handler(*struct.unpack('=fff', self.message_buffer))
-
-                if self.message_id == 121:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'RC_NORMAL_Request_Handler'):
-
-                            self.RC_NORMAL_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'RC_NORMAL_Handler'):
-
-                            self.RC_NORMAL_Handler(*struct.unpack('=ffffff', self.message_buffer))
-
-                if self.message_id == 122:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'ATTITUDE_RADIANS_Request_Handler'):
-
-                            self.ATTITUDE_RADIANS_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'ATTITUDE_RADIANS_Handler'):
-
-                            self.ATTITUDE_RADIANS_Handler(*struct.unpack('=fff', self.message_buffer))
-
-                if self.message_id == 123:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'ALTITUDE_METERS_Request_Handler'):
-
-                            self.ALTITUDE_METERS_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'ALTITUDE_METERS_Handler'):
-
-                            self.ALTITUDE_METERS_Handler(*struct.unpack('=ff', self.message_buffer))
-
-                if self.message_id == 126:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'LOITER_Request_Handler'):
-
-                            self.LOITER_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'LOITER_Handler'):
-
-                            self.LOITER_Handler(*struct.unpack('=fff', self.message_buffer))
-
-                if self.message_id == 199:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'FAKE_INT_Request_Handler'):
-
-                            self.FAKE_INT_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'FAKE_INT_Handler'):
-
-                            self.FAKE_INT_Handler(*struct.unpack('=ii', self.message_buffer))
-
-                if self.message_id == 124:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'GET_MOTOR_NORMAL_Request_Handler'):
-
-                            self.GET_MOTOR_NORMAL_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'GET_MOTOR_NORMAL_Handler'):
-
-                            self.GET_MOTOR_NORMAL_Handler(*struct.unpack('=ffff', self.message_buffer))
-
-                if self.message_id == 1:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_ARM_Request_Handler'):
-
-                            self.WP_ARM_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_ARM_Handler'):
-
-                            self.WP_ARM_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 2:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_DISARM_Request_Handler'):
-
-                            self.WP_DISARM_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_DISARM_Handler'):
-
-                            self.WP_DISARM_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 3:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_LAND_Request_Handler'):
-
-                            self.WP_LAND_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_LAND_Handler'):
-
-                            self.WP_LAND_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 4:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_TAKE_OFF_Request_Handler'):
-
-                            self.WP_TAKE_OFF_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_TAKE_OFF_Handler'):
-
-                            self.WP_TAKE_OFF_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 5:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_GO_FORWARD_Request_Handler'):
-
-                            self.WP_GO_FORWARD_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_GO_FORWARD_Handler'):
-
-                            self.WP_GO_FORWARD_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 6:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_GO_BACKWARD_Request_Handler'):
-
-                            self.WP_GO_BACKWARD_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_GO_BACKWARD_Handler'):
-
-                            self.WP_GO_BACKWARD_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 7:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_GO_LEFT_Request_Handler'):
-
-                            self.WP_GO_LEFT_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_GO_LEFT_Handler'):
-
-                            self.WP_GO_LEFT_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 8:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_GO_RIGHT_Request_Handler'):
-
-                            self.WP_GO_RIGHT_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_GO_RIGHT_Handler'):
+        # Preallocated frame buffer, filled in place for every message with
+        # its header, payload and checksum. MSP v1 payload lengths fit in a
+        # single byte. The whole frame is kept so that, if it turns out to be
+        # corrupt, its bytes can be scanned for the start of the next message
+        self._buffer = bytearray(_HEADER_LENGTH + MAX_PAYLOAD_LENGTH + 1)
+        self._buffer[:2] = b'$M'
+        self._payload = memoryview(self._buffer)[_HEADER_LENGTH:]
 
-                            self.WP_GO_RIGHT_Handler(*struct.unpack('=BB', self.message_buffer))
+        # Dispatch table mapping (message ID, direction) to the payload struct,
+        # the handler registered for that message and, depending on what the
+        # handler takes, the constructor of the message record or view
+        self._dispatch = {}
 
-                if self.message_id == 9:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_CHANGE_ALTITUDE_Request_Handler'):
-
-                            self.WP_CHANGE_ALTITUDE_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_CHANGE_ALTITUDE_Handler'):
-
-                            self.WP_CHANGE_ALTITUDE_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 10:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_CHANGE_SPEED_Request_Handler'):
-
-                            self.WP_CHANGE_SPEED_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_CHANGE_SPEED_Handler'):
-
-                            self.WP_CHANGE_SPEED_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 11:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_HOVER_Request_Handler'):
-
-                            self.WP_HOVER_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_HOVER_Handler'):
-
-                            self.WP_HOVER_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 12:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_TURN_CW_Request_Handler'):
-
-                            self.WP_TURN_CW_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_TURN_CW_Handler'):
-
-                            self.WP_TURN_CW_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 13:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_TURN_CCW_Request_Handler'):
-
-                            self.WP_TURN_CCW_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_TURN_CCW_Handler'):
-
-                            self.WP_TURN_CCW_Handler(*struct.unpack('=BB', self.message_buffer))
-
-                if self.message_id == 23:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_MISSION_FLAG_Request_Handler'):
-
-                            self.WP_MISSION_FLAG_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_MISSION_FLAG_Handler'):
-
-                            self.WP_MISSION_FLAG_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 24:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'ESC_CALIBRATION_Request_Handler'):
-
-                            self.ESC_CALIBRATION_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'ESC_CALIBRATION_Handler'):
-
-                            self.ESC_CALIBRATION_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 25:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'MOSQUITO_VERSION_Request_Handler'):
-
-                            self.MOSQUITO_VERSION_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'MOSQUITO_VERSION_Handler'):
-
-                            self.MOSQUITO_VERSION_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 26:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'POSITION_BOARD_Request_Handler'):
-
-                            self.POSITION_BOARD_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'POSITION_BOARD_Handler'):
-
-                            self.POSITION_BOARD_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 27:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'POSITION_BOARD_CONNECTED_Request_Handler'):
-
-                            self.POSITION_BOARD_CONNECTED_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'POSITION_BOARD_CONNECTED_Handler'):
-
-                            self.POSITION_BOARD_CONNECTED_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 30:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'WP_MISSION_BEGIN_Request_Handler'):
-
-                            self.WP_MISSION_BEGIN_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'WP_MISSION_BEGIN_Handler'):
-
-                            self.WP_MISSION_BEGIN_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 50:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'FIRMWARE_VERSION_Request_Handler'):
-
-                            self.FIRMWARE_VERSION_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'FIRMWARE_VERSION_Handler'):
-
-                            self.FIRMWARE_VERSION_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 127:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'GET_PID_CONSTANTS_Request_Handler'):
-
-                            self.GET_PID_CONSTANTS_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'GET_PID_CONSTANTS_Handler'):
-
-                            self.GET_PID_CONSTANTS_Handler(*struct.unpack('=fffffffffffffffffff', self.message_buffer))
-
-                if self.message_id == 119:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'RC_CALIBRATION_STATUS_Request_Handler'):
-
-                            self.RC_CALIBRATION_STATUS_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'RC_CALIBRATION_STATUS_Handler'):
-
-                            self.RC_CALIBRATION_STATUS_Handler(*struct.unpack('=B', self.message_buffer))
-
-                if self.message_id == 125:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'GET_BATTERY_VOLTAGE_Request_Handler'):
-
-                            self.GET_BATTERY_VOLTAGE_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'GET_BATTERY_VOLTAGE_Handler'):
-
-                            self.GET_BATTERY_VOLTAGE_Handler(*struct.unpack('=f', self.message_buffer))
-
-                if self.message_id == 116:
-
-                    if self.message_direction == 0:
-
-                        if hasattr(self, 'GET_MISSION_COMPLETE_Request_Handler'):
-
-                            self.GET_MISSION_COMPLETE_Request_Handler()
-
-                    else:
-
-                        if hasattr(self, 'GET_MISSION_COMPLETE_Handler'):
-
-                            self.GET_MISSION_COMPLETE_Handler(*struct.unpack('=B', self.message_buffer))
-
-            else:
-                print('code: ' + str(self.message_id) + ' - crc failed')
-            # Reset variables
-            self.message_length_received = 0
-            self.state = 0
-
-        else:
-            print('Unknown state detected: %d' % self.state)
-
-
-
-    def set_RAW_IMU_Handler(self, handler):
+        # Message and error counters
+        self.stats = ParserStats()
 
+    def __getattr__(self, name):
         '''
-        Sets the handler method for when a RAW_IMU message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            accx,accy,accz,gyrx,gyry,gyrz,magx,magy,magz
+        Generates the set_<NAME>_Handler methods the first time they are accessed.
         '''
-        self.RAW_IMU_Handler = handler
-
-    def set_GET_VELOCITIES_Handler(self, handler):
+        message = _generated(name, 'set_', '_Handler')
+        if message is None or message not in _MESSAGES_BY_NAME:
+            raise AttributeError('{} object has no attribute {}'.format(type(self).__name__, name))
+        setter = _make_handler_setter(message)
+        setter.__name__ = name
+        setter.__qualname__ = type(self).__name__ + '.' + name
+        # Cache the method in the class so that this hook is not called again for it
+        setattr(MSP_Parser, name, setter)
+        return getattr(self, name)
 
+    def parse(self, char):
         '''
-        Sets the handler method for when a GET_VELOCITIES message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            velx,vely,velz
+        Parses one character, triggering pre-set handlers upon a successful parse.
         '''
-        self.GET_VELOCITIES_Handler = handler
+        self.parse_bytes(char)
+
+    def parse_bytes(self, data):
+        '''
+        Parses a chunk of bytes (bytes, bytearray or memoryview) of any length,
+        triggering pre-set handlers upon every successful parse. A message split
+        between chunks is completed by the following calls.
+        '''
+
+        data = memoryview(data)
+        size = len(data)
+        pos = 0
+
+        while pos < size:
+
+            if self.state ==  0: # sync chars
+                match = _SYNC.search(data, pos)
+                if match is None:
+                    # A trailing $ may be followed by an M in the next chunk
+                    if data[size-1] == 36: # $
+                        self.state = 1
+                        size -= 1
+                    if size > pos:
+                        # Bytes between messages, the stream is out of sync
+                        self.stats.error(RESYNC)
+                    break
+                if match.start() != pos:
+                    # Bytes between messages, the stream is out of sync
+                    self.stats.error(RESYNC)
+                pos = match.end()
+                self.state = 2
+
+            elif self.state ==  1: # sync char 2 (sync char 1 ended the previous chunk)
+                if data[pos] == 77: # M
+                    pos += 1
+                    self.state = 2
+                else: # restart and try again
+                    self.stats.error(RESYNC)
+                    self.state = 0
+
+            elif self.state ==  2: # direction
+                byte = data[pos]
+                if byte == 62:  # >
+                    self.message_direction = 1
+                elif byte == 60: # <
+                    self.message_direction = 0
+                elif byte == 33: # ! (error)
+                    self.message_direction = 2
+                else:
+                    # Not a message header. Restart from this byte, which
+                    # may be the start of the next message
+                    self.stats.error(RESYNC)
+                    self.state = 0
+                    continue
+                self._buffer[2] = byte
+                pos += 1
+                self.state = 3
+
+            elif self.state ==  3:
+                self.message_length_expected = data[pos]
+                self.message_checksum = data[pos]
+                self._buffer[3] = data[pos]
+                pos += 1
+                self.state = 4
+
+            elif self.state ==  4:
+                self.message_id = data[pos]
+                self.message_length_received  = 0
+                self.message_checksum ^= data[pos]
+                self._buffer[4] = data[pos]
+                pos += 1
+                if self.message_length_expected > _MAX_LENGTHS[self.message_id]:
+                    # Reject it before buffering a corrupt length worth of bytes
+                    self.stats.error(OVERSIZED, self.message_id)
+                    self._resync(_HEADER_LENGTH)
+                elif self.message_length_expected > 0:
+                    # process payload
+                    self.state = 5
+                else:
+                    # no payload
+                    self.state = 6
+
+            elif self.state ==  5: # payload
+                # Take as much of the payload as this chunk holds in one slice
+                received = self.message_length_received
+                end = min(pos + self.message_length_expected - received, size)
+                payload = data[pos:end]
+                self._payload[received:received + end - pos] = payload
+                self.message_checksum = crc8(payload, self.message_checksum)
+                self.message_length_received = received + end - pos
+                pos = end
+                if self.message_length_received >= self.message_length_expected:
+                    self.state = 6
+
+            elif self.state ==  6:
+                length = self.message_length_expected
+                self._buffer[_HEADER_LENGTH + length] = data[pos]
+                pos += 1
+                self.state = 0
+                if self.message_checksum == data[pos - 1]:
+                    self.stats.messages[self.message_id] += 1
+                    # message received, dispatch it. Messages without a
+                    # registered handler are not unpacked at all, and the
+                    # rest are unpacked straight from the payload buffer
+                    entry = self._dispatch.get((self.message_id, self.message_direction))
+                    if entry is not None:
+                        self._dispatch_message(entry)
+                    elif self.message_id not in _MESSAGE_IDS:
+                        self.stats.error(UNKNOWN_ID, self.message_id)
+                else:
+                    self.stats.error(CRC_FAILURE, self.message_id)
+                    self._resync(_HEADER_LENGTH + length + 1)
 
-    def set_RC_NORMAL_Handler(self, handler):
+            else:
+                print('Unknown state detected: %d' % self.state)
+                break
 
+    def _resync(self, end):
         '''
-        Sets the handler method for when a RC_NORMAL message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            c1,c2,c3,c4,c5,c6
+        Discards the message held in the frame buffer up to end and parses
+        again the bytes it consumed, starting from the next $ after its own
+        start, in case a dropped byte made it swallow the next message
         '''
-        self.RC_NORMAL_Handler = handler
-
-    def set_ATTITUDE_RADIANS_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a ATTITUDE_RADIANS message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            roll,pitch,yaw
-        '''
-        self.ATTITUDE_RADIANS_Handler = handler
-
-    def set_ALTITUDE_METERS_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a ALTITUDE_METERS message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            estalt,vario
-        '''
-        self.ALTITUDE_METERS_Handler = handler
-
-    def set_LOITER_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a LOITER message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            agl,flowx,flowy
-        '''
-        self.LOITER_Handler = handler
-
-    def set_FAKE_INT_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a FAKE_INT message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            value1,value2
-        '''
-        self.FAKE_INT_Handler = handler
-
-    def set_GET_MOTOR_NORMAL_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a GET_MOTOR_NORMAL message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            m1,m2,m3,m4
-        '''
-        self.GET_MOTOR_NORMAL_Handler = handler
-
-    def set_WP_ARM_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_ARM message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            code
-        '''
-        self.WP_ARM_Handler = handler
-
-    def set_WP_DISARM_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_DISARM message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            code
-        '''
-        self.WP_DISARM_Handler = handler
-
-    def set_WP_LAND_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_LAND message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            code
-        '''
-        self.WP_LAND_Handler = handler
-
-    def set_WP_TAKE_OFF_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_TAKE_OFF message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_TAKE_OFF_Handler = handler
-
-    def set_WP_GO_FORWARD_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_GO_FORWARD message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_GO_FORWARD_Handler = handler
-
-    def set_WP_GO_BACKWARD_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_GO_BACKWARD message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_GO_BACKWARD_Handler = handler
-
-    def set_WP_GO_LEFT_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_GO_LEFT message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_GO_LEFT_Handler = handler
-
-    def set_WP_GO_RIGHT_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_GO_RIGHT message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_GO_RIGHT_Handler = handler
-
-    def set_WP_CHANGE_ALTITUDE_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_CHANGE_ALTITUDE message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            meters,code
-        '''
-        self.WP_CHANGE_ALTITUDE_Handler = handler
-
-    def set_WP_CHANGE_SPEED_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_CHANGE_SPEED message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            speed,code
-        '''
-        self.WP_CHANGE_SPEED_Handler = handler
-
-    def set_WP_HOVER_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_HOVER message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            seconds,code
-        '''
-        self.WP_HOVER_Handler = handler
-
-    def set_WP_TURN_CW_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_TURN_CW message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            degrees,code
-        '''
-        self.WP_TURN_CW_Handler = handler
-
-    def set_WP_TURN_CCW_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_TURN_CCW message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            degrees,code
-        '''
-        self.WP_TURN_CCW_Handler = handler
-
-    def set_WP_MISSION_FLAG_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_MISSION_FLAG message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            flag
-        '''
-        self.WP_MISSION_FLAG_Handler = handler
-
-    def set_ESC_CALIBRATION_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a ESC_CALIBRATION message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            protocol
-        '''
-        self.ESC_CALIBRATION_Handler = handler
-
-    def set_MOSQUITO_VERSION_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a MOSQUITO_VERSION message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            mosquitoVersion
-        '''
-        self.MOSQUITO_VERSION_Handler = handler
-
-    def set_POSITION_BOARD_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a POSITION_BOARD message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            hasPositionBoard
-        '''
-        self.POSITION_BOARD_Handler = handler
-
-    def set_POSITION_BOARD_CONNECTED_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a POSITION_BOARD_CONNECTED message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            positionBoardConnected
-        '''
-        self.POSITION_BOARD_CONNECTED_Handler = handler
-
-    def set_WP_MISSION_BEGIN_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a WP_MISSION_BEGIN message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            flag
-        '''
-        self.WP_MISSION_BEGIN_Handler = handler
-
-    def set_FIRMWARE_VERSION_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a FIRMWARE_VERSION message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            version
-        '''
-        self.FIRMWARE_VERSION_Handler = handler
-
-    def set_GET_PID_CONSTANTS_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a GET_PID_CONSTANTS message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            gyroRollP,gyroRollI,gyroRollD,gyroPitchP,gyroPitchI,gyroPitchD,gyroYawP,gyroYawI,demandsToRate,levelP,altHoldP,altHoldVelP,altHoldVelI,altHoldVelD,minAltitude,param6,param7,param8,param9
-        '''
-        self.GET_PID_CONSTANTS_Handler = handler
-
-    def set_RC_CALIBRATION_STATUS_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a RC_CALIBRATION_STATUS message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            status
-        '''
-        self.RC_CALIBRATION_STATUS_Handler = handler
-
-    def set_GET_BATTERY_VOLTAGE_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a GET_BATTERY_VOLTAGE message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            voltage
-        '''
-        self.GET_BATTERY_VOLTAGE_Handler = handler
-
-    def set_GET_MISSION_COMPLETE_Handler(self, handler):
-
-        '''
-        Sets the handler method for when a GET_MISSION_COMPLETE message is successfully parsed.
-        You should declare this message with the following parameter(s):
-            status
-        '''
-        self.GET_MISSION_COMPLETE_Handler = handler
-
-def serialize_RAW_IMU(accx, accy, accz, gyrx, gyry, gyrz, magx, magy, magz):
-    '''
-    Serializes the contents of a message of type RAW_IMU.
-    '''
-    message_buffer = struct.pack('hhhhhhhhh', accx, accy, accz, gyrx, gyry, gyrz, magx, magy, magz)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(102) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 102] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_RAW_IMU_Request():
-
-    '''
-    Serializes a request for RAW_IMU data.
-    '''
-    msg = '$M<' + chr(0) + chr(102) + chr(102)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_GET_VELOCITIES(velx, vely, velz):
-    '''
-    Serializes the contents of a message of type GET_VELOCITIES.
-    '''
-    message_buffer = struct.pack('fff', velx, vely, velz)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(103) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 103] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_VELOCITIES_Request():
-
-    '''
-    Serializes a request for GET_VELOCITIES data.
-    '''
-    msg = '$M<' + chr(0) + chr(103) + chr(103)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_RC_NORMAL(c1, c2, c3, c4, c5, c6):
-    '''
-    Serializes the contents of a message of type RC_NORMAL.
-    '''
-    message_buffer = struct.pack('ffffff', c1, c2, c3, c4, c5, c6)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(121) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 121] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_RC_NORMAL_Request():
-
-    '''
-    Serializes a request for RC_NORMAL data.
-    '''
-    msg = '$M<' + chr(0) + chr(121) + chr(121)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_RC_NORMAL(c1, c2, c3, c4, c5, c6):
-    '''
-    Serializes the contents of a message of type SET_RC_NORMAL.
-    '''
-    message_buffer = struct.pack('ffffff', c1, c2, c3, c4, c5, c6)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(222) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 222] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_LOST_SIGNAL(flag):
-    '''
-    Serializes the contents of a message of type LOST_SIGNAL.
-    '''
-    message_buffer = struct.pack('B', flag)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(226) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 226] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_ATTITUDE_RADIANS(roll, pitch, yaw):
-    '''
-    Serializes the contents of a message of type ATTITUDE_RADIANS.
-    '''
-    message_buffer = struct.pack('fff', roll, pitch, yaw)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(122) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 122] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_ATTITUDE_RADIANS_Request():
-
-    '''
-    Serializes a request for ATTITUDE_RADIANS data.
-    '''
-    msg = '$M<' + chr(0) + chr(122) + chr(122)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_ALTITUDE_METERS(estalt, vario):
-    '''
-    Serializes the contents of a message of type ALTITUDE_METERS.
-    '''
-    message_buffer = struct.pack('ff', estalt, vario)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(123) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 123] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_ALTITUDE_METERS_Request():
-
-    '''
-    Serializes a request for ALTITUDE_METERS data.
-    '''
-    msg = '$M<' + chr(0) + chr(123) + chr(123)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_LOITER(agl, flowx, flowy):
-    '''
-    Serializes the contents of a message of type LOITER.
-    '''
-    message_buffer = struct.pack('fff', agl, flowx, flowy)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(126) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 126] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_LOITER_Request():
-
-    '''
-    Serializes a request for LOITER data.
-    '''
-    msg = '$M<' + chr(0) + chr(126) + chr(126)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_ARMED(flag):
-    '''
-    Serializes the contents of a message of type SET_ARMED.
-    '''
-    message_buffer = struct.pack('B', flag)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(216) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 216] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_FAKE_INT(value1, value2):
-    '''
-    Serializes the contents of a message of type FAKE_INT.
-    '''
-    message_buffer = struct.pack('ii', value1, value2)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(199) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 199] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_FAKE_INT_Request():
-
-    '''
-    Serializes a request for FAKE_INT data.
-    '''
-    msg = '$M<' + chr(0) + chr(199) + chr(199)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_MOTOR_NORMAL(m1, m2, m3, m4):
-    '''
-    Serializes the contents of a message of type SET_MOTOR_NORMAL.
-    '''
-    message_buffer = struct.pack('ffff', m1, m2, m3, m4)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(215) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 215] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_MOTOR_NORMAL(m1, m2, m3, m4):
-    '''
-    Serializes the contents of a message of type GET_MOTOR_NORMAL.
-    '''
-    message_buffer = struct.pack('ffff', m1, m2, m3, m4)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(124) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 124] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_MOTOR_NORMAL_Request():
-
-    '''
-    Serializes a request for GET_MOTOR_NORMAL data.
-    '''
-    msg = '$M<' + chr(0) + chr(124) + chr(124)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_ARM(code):
-    '''
-    Serializes the contents of a message of type WP_ARM.
-    '''
-    message_buffer = struct.pack('B', code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(1) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 1] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_ARM_Request():
-
-    '''
-    Serializes a request for WP_ARM data.
-    '''
-    msg = '$M<' + chr(0) + chr(1) + chr(1)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_DISARM(code):
-    '''
-    Serializes the contents of a message of type WP_DISARM.
-    '''
-    message_buffer = struct.pack('B', code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(2) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 2] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_DISARM_Request():
-
-    '''
-    Serializes a request for WP_DISARM data.
-    '''
-    msg = '$M<' + chr(0) + chr(2) + chr(2)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_LAND(code):
-    '''
-    Serializes the contents of a message of type WP_LAND.
-    '''
-    message_buffer = struct.pack('B', code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(3) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 3] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_LAND_Request():
-
-    '''
-    Serializes a request for WP_LAND data.
-    '''
-    msg = '$M<' + chr(0) + chr(3) + chr(3)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_TAKE_OFF(meters, code):
-    '''
-    Serializes the contents of a message of type WP_TAKE_OFF.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(4) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 4] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_TAKE_OFF_Request():
-
-    '''
-    Serializes a request for WP_TAKE_OFF data.
-    '''
-    msg = '$M<' + chr(0) + chr(4) + chr(4)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_GO_FORWARD(meters, code):
-    '''
-    Serializes the contents of a message of type WP_GO_FORWARD.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(5) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 5] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_GO_FORWARD_Request():
-
-    '''
-    Serializes a request for WP_GO_FORWARD data.
-    '''
-    msg = '$M<' + chr(0) + chr(5) + chr(5)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_GO_BACKWARD(meters, code):
-    '''
-    Serializes the contents of a message of type WP_GO_BACKWARD.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(6) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 6] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_GO_BACKWARD_Request():
-
-    '''
-    Serializes a request for WP_GO_BACKWARD data.
-    '''
-    msg = '$M<' + chr(0) + chr(6) + chr(6)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_GO_LEFT(meters, code):
-    '''
-    Serializes the contents of a message of type WP_GO_LEFT.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(7) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 7] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_GO_LEFT_Request():
-
-    '''
-    Serializes a request for WP_GO_LEFT data.
-    '''
-    msg = '$M<' + chr(0) + chr(7) + chr(7)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_GO_RIGHT(meters, code):
-    '''
-    Serializes the contents of a message of type WP_GO_RIGHT.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(8) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 8] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_GO_RIGHT_Request():
-
-    '''
-    Serializes a request for WP_GO_RIGHT data.
-    '''
-    msg = '$M<' + chr(0) + chr(8) + chr(8)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_CHANGE_ALTITUDE(meters, code):
-    '''
-    Serializes the contents of a message of type WP_CHANGE_ALTITUDE.
-    '''
-    message_buffer = struct.pack('BB', meters, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(9) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 9] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_CHANGE_ALTITUDE_Request():
-
-    '''
-    Serializes a request for WP_CHANGE_ALTITUDE data.
-    '''
-    msg = '$M<' + chr(0) + chr(9) + chr(9)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_CHANGE_SPEED(speed, code):
-    '''
-    Serializes the contents of a message of type WP_CHANGE_SPEED.
-    '''
-    message_buffer = struct.pack('BB', speed, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(10) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 10] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_CHANGE_SPEED_Request():
-
-    '''
-    Serializes a request for WP_CHANGE_SPEED data.
-    '''
-    msg = '$M<' + chr(0) + chr(10) + chr(10)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_HOVER(seconds, code):
-    '''
-    Serializes the contents of a message of type WP_HOVER.
-    '''
-    message_buffer = struct.pack('BB', seconds, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(11) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 11] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_HOVER_Request():
-
-    '''
-    Serializes a request for WP_HOVER data.
-    '''
-    msg = '$M<' + chr(0) + chr(11) + chr(11)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_TURN_CW(degrees, code):
-    '''
-    Serializes the contents of a message of type WP_TURN_CW.
-    '''
-    message_buffer = struct.pack('BB', degrees, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(12) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 12] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_TURN_CW_Request():
-
-    '''
-    Serializes a request for WP_TURN_CW data.
-    '''
-    msg = '$M<' + chr(0) + chr(12) + chr(12)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_TURN_CCW(degrees, code):
-    '''
-    Serializes the contents of a message of type WP_TURN_CCW.
-    '''
-    message_buffer = struct.pack('BB', degrees, code)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(13) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 13] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_TURN_CCW_Request():
-
-    '''
-    Serializes a request for WP_TURN_CCW data.
-    '''
-    msg = '$M<' + chr(0) + chr(13) + chr(13)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_MISSION_FLAG(flag):
-    '''
-    Serializes the contents of a message of type WP_MISSION_FLAG.
-    '''
-    message_buffer = struct.pack('B', flag)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(23) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 23] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_MISSION_FLAG_Request():
-
-    '''
-    Serializes a request for WP_MISSION_FLAG data.
-    '''
-    msg = '$M<' + chr(0) + chr(23) + chr(23)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_ESC_CALIBRATION(protocol):
-    '''
-    Serializes the contents of a message of type ESC_CALIBRATION.
-    '''
-    message_buffer = struct.pack('B', protocol)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(24) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 24] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_ESC_CALIBRATION_Request():
-
-    '''
-    Serializes a request for ESC_CALIBRATION data.
-    '''
-    msg = '$M<' + chr(0) + chr(24) + chr(24)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_MOSQUITO_VERSION(mosquitoVersion):
-    '''
-    Serializes the contents of a message of type MOSQUITO_VERSION.
-    '''
-    message_buffer = struct.pack('B', mosquitoVersion)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(25) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 25] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_MOSQUITO_VERSION_Request():
-
-    '''
-    Serializes a request for MOSQUITO_VERSION data.
-    '''
-    msg = '$M<' + chr(0) + chr(25) + chr(25)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_POSITION_BOARD(hasPositionBoard):
-    '''
-    Serializes the contents of a message of type POSITION_BOARD.
-    '''
-    message_buffer = struct.pack('B', hasPositionBoard)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(26) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 26] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_POSITION_BOARD_Request():
-
-    '''
-    Serializes a request for POSITION_BOARD data.
-    '''
-    msg = '$M<' + chr(0) + chr(26) + chr(26)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_POSITION_BOARD_CONNECTED(positionBoardConnected):
-    '''
-    Serializes the contents of a message of type POSITION_BOARD_CONNECTED.
-    '''
-    message_buffer = struct.pack('B', positionBoardConnected)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(27) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 27] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_POSITION_BOARD_CONNECTED_Request():
-
-    '''
-    Serializes a request for POSITION_BOARD_CONNECTED data.
-    '''
-    msg = '$M<' + chr(0) + chr(27) + chr(27)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_WP_MISSION_BEGIN(flag):
-    '''
-    Serializes the contents of a message of type WP_MISSION_BEGIN.
-    '''
-    message_buffer = struct.pack('B', flag)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(30) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 30] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_WP_MISSION_BEGIN_Request():
-
-    '''
-    Serializes a request for WP_MISSION_BEGIN data.
-    '''
-    msg = '$M<' + chr(0) + chr(30) + chr(30)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_FIRMWARE_VERSION(version):
-    '''
-    Serializes the contents of a message of type FIRMWARE_VERSION.
-    '''
-    message_buffer = struct.pack('B', version)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(50) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 50] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_FIRMWARE_VERSION_Request():
-
-    '''
-    Serializes a request for FIRMWARE_VERSION data.
-    '''
-    msg = '$M<' + chr(0) + chr(50) + chr(50)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_MOSQUITO_VERSION(version):
-    '''
-    Serializes the contents of a message of type SET_MOSQUITO_VERSION.
-    '''
-    message_buffer = struct.pack('B', version)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(223) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 223] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_SET_PID_CONSTANTS(gyroRollP, gyroRollI, gyroRollD, gyroPitchP, gyroPitchI, gyroPitchD, gyroYawP, gyroYawI, demandsToRate, levelP, altHoldP, altHoldVelP, altHoldVelI, altHoldVelD, minAltitude, param6, param7, param8, param9):
-    '''
-    Serializes the contents of a message of type SET_PID_CONSTANTS.
-    '''
-    message_buffer = struct.pack('fffffffffffffffffff', gyroRollP, gyroRollI, gyroRollD, gyroPitchP, gyroPitchI, gyroPitchD, gyroYawP, gyroYawI, demandsToRate, levelP, altHoldP, altHoldVelP, altHoldVelI, altHoldVelD, minAltitude, param6, param7, param8, param9)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(224) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 224] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_PID_CONSTANTS(gyroRollP, gyroRollI, gyroRollD, gyroPitchP, gyroPitchI, gyroPitchD, gyroYawP, gyroYawI, demandsToRate, levelP, altHoldP, altHoldVelP, altHoldVelI, altHoldVelD, minAltitude, param6, param7, param8, param9):
-    '''
-    Serializes the contents of a message of type GET_PID_CONSTANTS.
-    '''
-    message_buffer = struct.pack('fffffffffffffffffff', gyroRollP, gyroRollI, gyroRollD, gyroPitchP, gyroPitchI, gyroPitchD, gyroYawP, gyroYawI, demandsToRate, levelP, altHoldP, altHoldVelP, altHoldVelI, altHoldVelD, minAltitude, param6, param7, param8, param9)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(127) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 127] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_PID_CONSTANTS_Request():
-
-    '''
-    Serializes a request for GET_PID_CONSTANTS data.
-    '''
-    msg = '$M<' + chr(0) + chr(127) + chr(127)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_POSITIONING_BOARD(hasBoard):
-    '''
-    Serializes the contents of a message of type SET_POSITIONING_BOARD.
-    '''
-    message_buffer = struct.pack('B', hasBoard)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(225) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 225] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_SET_LEDS(red, green, blue):
-    '''
-    Serializes the contents of a message of type SET_LEDS.
-    '''
-    message_buffer = struct.pack('BBB', red, green, blue)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(227) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 227] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_RC_CALIBRATION(stage):
-    '''
-    Serializes the contents of a message of type RC_CALIBRATION.
-    '''
-    message_buffer = struct.pack('B', stage)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(214) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 214] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_RC_CALIBRATION_STATUS(status):
-    '''
-    Serializes the contents of a message of type RC_CALIBRATION_STATUS.
-    '''
-    message_buffer = struct.pack('B', status)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(119) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 119] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_RC_CALIBRATION_STATUS_Request():
-
-    '''
-    Serializes a request for RC_CALIBRATION_STATUS data.
-    '''
-    msg = '$M<' + chr(0) + chr(119) + chr(119)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_BATTERY_VOLTAGE(batteryVoltage):
-    '''
-    Serializes the contents of a message of type SET_BATTERY_VOLTAGE.
-    '''
-    message_buffer = struct.pack('f', batteryVoltage)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(228) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 228] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_SET_EMERGENCY_STOP(flag):
-    '''
-    Serializes the contents of a message of type SET_EMERGENCY_STOP.
-    '''
-    message_buffer = struct.pack('B', flag)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(229) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 229] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_BATTERY_VOLTAGE(voltage):
-    '''
-    Serializes the contents of a message of type GET_BATTERY_VOLTAGE.
-    '''
-    message_buffer = struct.pack('f', voltage)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(125) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 125] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_BATTERY_VOLTAGE_Request():
-
-    '''
-    Serializes a request for GET_BATTERY_VOLTAGE data.
-    '''
-    msg = '$M<' + chr(0) + chr(125) + chr(125)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_GET_MISSION_COMPLETE(status):
-    '''
-    Serializes the contents of a message of type GET_MISSION_COMPLETE.
-    '''
-    message_buffer = struct.pack('B', status)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(116) + str(message_buffer)
-        return '$M>' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 116] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_GET_MISSION_COMPLETE_Request():
-
-    '''
-    Serializes a request for GET_MISSION_COMPLETE data.
-    '''
-    msg = '$M<' + chr(0) + chr(116) + chr(116)
-    return bytes(msg) if sys.version[0] == '2' else bytes(msg, 'utf-8')
-
-def serialize_SET_RANGE_PARAMETERS(rx, ry, rz):
-    '''
-    Serializes the contents of a message of type SET_RANGE_PARAMETERS.
-    '''
-    message_buffer = struct.pack('fff', rx, ry, rz)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(221) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 221] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
-def serialize_CLEAR_EEPROM(section):
-    '''
-    Serializes the contents of a message of type CLEAR_EEPROM.
-    '''
-    message_buffer = struct.pack('B', section)
-
-    if sys.version[0] == '2':
-        msg = chr(len(message_buffer)) + chr(201) + str(message_buffer)
-        return '$M<' + msg + chr(_CRC8(msg))
-
-    else:
-        msg = [len(message_buffer), 201] + list(message_buffer)
-        return bytes([ord('$'), ord('M'), ord('<')] + msg + [_CRC8(msg)])
-
+        self.stats.error(RESYNC, self.message_id)
+        self.state = 0
+        start = self._buffer.find(b'$', 1, end)
+        if start >= 0:
+            # Copied, since parsing them again overwrites the frame buffer
+            self.parse_bytes(bytes(self._buffer[start:end]))
+
+    def _dispatch_message(self, entry):
+        '''
+        Calls the handler of the message held in the payload buffer
+        '''
+        payload_struct, handler, record, view = entry
+        length = self.message_length_expected
+        if length != payload_struct.size:
+            self.stats.error(OVERSIZED if length > payload_struct.size else UNDERSIZED, self.message_id)
+            return
+        try:
+            if view is not None:
+                # The payload buffer is reused, so views keep a copy
+                handler(view(self._payload[:length].tobytes()))
+            elif record is None:
+                handler(*payload_struct.unpack_from(self._buffer, _HEADER_LENGTH))
+            else:
+                handler(record(payload_struct.unpack_from(self._buffer, _HEADER_LENGTH)))
+        except Exception:
+            self.stats.error(HANDLER_ERROR, self.message_id)
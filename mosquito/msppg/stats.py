@@ -0,0 +1,81 @@
+'''
+stats.py Statistics of an MSP parser
+
+Counters are plain integers updated in place by the parser, so reading them
+costs nothing. Errors can additionally be reported to a hook, which is
+called at most once per interval so that a noisy link cannot flood it.
+'''
+
+from time import monotonic
+
+# Kinds of parse errors
+CRC_FAILURE = 'crc_failure'
+UNKNOWN_ID = 'unknown_id'
+OVERSIZED = 'oversized'
+UNDERSIZED = 'undersized'
+HANDLER_ERROR = 'handler_error'
+RESYNC = 'resync'
+
+ERROR_KINDS = (CRC_FAILURE, UNKNOWN_ID, OVERSIZED, UNDERSIZED, HANDLER_ERROR, RESYNC)
+
+class ParserStats(object):
+    '''
+    Counters of the messages received by an MSP_Parser, indexed by message ID,
+    and of the errors found while parsing, indexed by error kind.
+    '''
+
+    __slots__ = ('messages', 'errors', '_hook', '_interval', '_last_report', '_suppressed')
+
+    def __init__(self):
+        self.messages = [0] * 256
+        self.errors = dict((kind, 0) for kind in ERROR_KINDS)
+        self._hook = None
+        self._interval = 0.0
+        self._last_report = None
+        self._suppressed = 0
+
+    def set_error_hook(self, hook, interval=1.0):
+        '''
+        Sets a function to be called with (kind, message_id, suppressed) when a
+        parse error happens, at most once every interval seconds. suppressed is
+        the number of errors not reported since the previous call. Setting the
+        hook to None disables it.
+        '''
+        self._hook = hook
+        self._interval = interval
+        self._last_report = None
+        self._suppressed = 0
+
+    def error(self, kind, message_id=None):
+        '''
+        Counts an error of the given kind and reports it to the hook, if any
+        and if it has not been called during the last interval.
+        '''
+        self.errors[kind] += 1
+        if self._hook is None:
+            return
+        now = monotonic()
+        if self._last_report is not None and now - self._last_report < self._interval:
+            self._suppressed += 1
+            return
+        self._last_report = now
+        suppressed, self._suppressed = self._suppressed, 0
+        self._hook(kind, message_id, suppressed)
+
+    def snapshot(self):
+        '''
+        Returns a dictionary with the number of messages received per message ID
+        (only for IDs that have been received) and the number of errors per kind.
+        '''
+        return {
+            'messages': dict((message_id, count) for message_id, count in enumerate(self.messages) if count),
+            'errors': dict(self.errors),
+        }
+
+    def reset(self):
+        '''
+        Sets every counter back to zero.
+        '''
+        self.messages[:] = [0] * 256
+        for kind in self.errors:
+            self.errors[kind] = 0
@@ -4,58 +4,349 @@
 # Author: Juan Gallostra (jgallostra<at>bonadrone.com)
 # Date: 03-07-2019
 
-import time
+from collections import deque, namedtuple
+from concurrent import futures
+from threading import Lock, Timer
+from time import monotonic
 
-def publisher(subscriber):
+# Received reply, with the monotonic time at which it was received
+Reply = namedtuple('Reply', ('timestamp', 'record'))
+
+class PendingReplies(object):
 	"""
-	Closure that stores the subscriber it is bound to and notifies it
-	when called with the new set of received values. Note that we only
-	allow a one to one relation between publishers and subscribers
+	Table of the requests waiting for a reply, indexed by message ID.
+	Every request gets a future, and the futures of the same message ID
+	are completed in the order they were issued as replies arrive.
+	This allows having many requests in flight at the same time.
+	The latest reply of every message ID is kept as well. Requests
+	that are not replied in time fail even if nobody is waiting for
+	them, from a timer that runs while there are pending requests
 	"""
-	subscriber = subscriber
-	def update_subscriber(*values):
+	def __init__(self, timeout=5, coalesce_window=0.5):
 		"""
-		Notify the subscriber with the newly received values
+		Initialize the table
+
+		:param timeout: seconds after which a request that has not been replied fails
+		:type timeout: float
+		:param coalesce_window: seconds during which a pending request is shared by new
+		requests of the same message ID. Older requests are probably lost, so a new
+		request is sent instead, and their callers get the first reply that arrives
+		:type coalesce_window: float
 		"""
-		# MSP received data is collected in values as a tuple.
-		# The processing of this values (extracting single values,
-		# casting to boolean) should be performed by the API getter
-		# linked to the subscriber 
-		subscriber.on_update(values)
-	return update_subscriber
+		self.__timeout = timeout
+		self.__coalesce_window = coalesce_window
+		self.__lock = Lock()
+		# Pending requests of every message ID as (deadline, future), oldest first
+		self.__pending = {}
+		# Latest reply of every message ID, whether requested or not
+		self.__latest = {}
+		# Function called with every reply of a message ID
+		self.__callbacks = {}
+		# Timer that fails the requests whose deadline has passed
+		self.__timer = None
 
-class Subscriber(object):
-	"""
-	Subscribe to a publisher and get notified when the publisher
-	is called and receives a new set of values
-	"""
-	def __init__(self, timeout=5):
+	def __expire(self, pending, now, expired):
+		"""
+		Remove the oldest requests whose deadline has passed. Must be called
+		with the lock held, and the expired futures failed once released
+
+		:param pending: pending requests of a message ID
+		:type pending: deque
+		:param now: current monotonic time
+		:type now: float
+		:param expired: list where the futures of the expired requests are added
+		:type expired: list
+		:return: None
+		:rtype: None
+		"""
+		while pending and pending[0][0] <= now:
+			expired.append(pending.popleft()[1])
+
+	def __sweep(self):
+		"""
+		Fail every request whose deadline has passed and schedule
+		the next sweep, if there are still pending requests. This
+		method runs on the timer thread
+
+		:return: None
+		:rtype: None
+		"""
+		now = monotonic()
+		expired = []
+		with self.__lock:
+			for pending in self.__pending.values():
+				self.__expire(pending, now, expired)
+			self.__timer = None
+			self.__schedule_sweep(now)
+		_fail(expired, TimeoutError("Timed out while waiting for response"))
+
+	def __schedule_sweep(self, now):
 		"""
-		Initialize the subscriber
+		Start the timer of the next sweep at the earliest deadline, unless
+		already started or there are no pending requests. Must be called
+		with the lock held
+
+		:param now: current monotonic time
+		:type now: float
+		:return: None
+		:rtype: None
+		"""
+		if self.__timer is not None:
+			return
+		deadlines = [pending[0][0] for pending in self.__pending.values() if pending]
+		if not deadlines:
+			return
+		self.__timer = Timer(max(0.0, min(deadlines) - now), self.__sweep)
+		self.__timer.daemon = True
+		self.__timer.start()
+
+	def add(self, message_id, coalesce=True, max_age=None):
+		"""
+		Register a new request. It must be registered before sending it,
+		so that its reply cannot arrive before the request is pending.
+		If coalescing, a request of the same message ID that was sent
+		less than the coalescing window ago and is still pending is
+		shared instead, so that its reply completes both and no new
+		request has to be sent. If the latest reply of the
+		message ID is recent enough, no request is needed either
+
+		:param message_id: ID of the reply message
+		:type message_id: int
+		:param coalesce: share the newest pending request of the same message ID, if any
+		:type coalesce: bool
+		:param max_age: maximum age in seconds of a previously received reply to be
+		used instead of requesting a new one. If None, a previous reply is never used
+		:type max_age: float
+		:return: future completed with the Reply, or with a TimeoutError, and
+		whether it belongs to a new request that has to be sent
+		:rtype: tuple
+		"""
+		now = monotonic()
+		expired = []
+		with self.__lock:
+			latest = self.__latest.get(message_id)
+			if max_age is not None and latest is not None and now - latest.timestamp <= max_age:
+				future = futures.Future()
+				future.set_running_or_notify_cancel()
+				future.set_result(latest)
+				return future, False
+			pending = self.__pending.setdefault(message_id, deque())
+			self.__expire(pending, now, expired)
+			# Deadlines are the time requests were sent plus the timeout
+			if (coalesce and pending and not pending[-1][1].done() and
+				now + self.__timeout - pending[-1][0] <= self.__coalesce_window):
+				future, new = pending[-1][1], False
+			else:
+				future, new = futures.Future(), True
+				pending.append((now + self.__timeout, future))
+				self.__schedule_sweep(now)
+		_fail(expired, TimeoutError("Timed out while waiting for response"))
+		return future, new
+
+	def subscribe(self, message_id, callback):
+		"""
+		Set a function to be called with every reply of a message ID,
+		whether requested or not. Setting it to None removes it
+
+		:param message_id: ID of the reply message
+		:type message_id: int
+		:param callback: function called with the Reply
+		:type callback: callable
+		:return: None
+		:rtype: None
 		"""
-		self.__timeout = timeout 
-		self.__updated = False
-		self.__data = None
+		with self.__lock:
+			if callback is None:
+				self.__callbacks.pop(message_id, None)
+			else:
+				self.__callbacks[message_id] = callback
 
-	def on_update(self, data):
+	def latest(self, message_id):
 		"""
-		Method that the publisher calls when a new value arrives.
-		It notifies the subscriber, which changes its state to 
-		updated and stores the value
+		Get the latest reply of a message ID
+
+		:param message_id: ID of the reply message
+		:type message_id: int
+		:return: latest Reply or None if the message has never been received
+		:rtype: Reply
 		"""
-		self.__data = data
-		self.__updated = True
+		return self.__latest.get(message_id)
 
-	def get_value(self):
+	def discard(self, message_id, future, exception):
 		"""
-		Blocking method that waits until the publisher notifies
-		that it has acquired a new value. This value is then 
-		retrieved by the subscriber and returned
+		Remove a request that could not be sent. Requests
+		sharing it fail with the same exception
+
+		:param message_id: ID of the reply message
+		:type message_id: int
+		:param future: future of the request
+		:type future: concurrent.futures.Future
+		:param exception: exception raised when sending the request
+		:type exception: Exception
+		:return: None
+		:rtype: None
 		"""
-		init_time = time.time()
-		while not self.__updated:
-			if time.time() - init_time > self.__timeout:
-				raise TimeoutError("Timed out while waiting for response")
-			pass
-		self.__updated = False
-		return self.__data
+		with self.__lock:
+			pending = self.__pending.get(message_id, ())
+			for entry in pending:
+				if entry[1] is future:
+					pending.remove(entry)
+					break
+		if future.set_running_or_notify_cancel():
+			future.set_exception(exception)
+
+	def fail_all(self, exception):
+		"""
+		Fail every pending request, e.g. when the connection is closed
+
+		:param exception: exception set on the futures
+		:type exception: Exception
+		:return: None
+		:rtype: None
+		"""
+		with self.__lock:
+			entries = [entry for pending in self.__pending.values() for entry in pending]
+			for pending in self.__pending.values():
+				pending.clear()
+		_fail([future for _, future in entries], exception)
+
+	def wait(self, future):
+		"""
+		Blocking method that waits until a request is replied
+		and returns the result of its future
+
+		:param future: future of the request, or chained to it
+		:type future: concurrent.futures.Future
+		:return: result of the future
+		"""
+		try:
+			return future.result(self.__timeout)
+		except futures.TimeoutError:
+			future.cancel()
+			raise TimeoutError("Timed out while waiting for response")
+
+	def publisher(self, message_id):
+		"""
+		Create the handler of a reply message, which keeps it as the
+		latest reply and completes the oldest request of its message
+		ID that is still pending
+
+		:param message_id: ID of the reply message
+		:type message_id: int
+		:return: reply handler
+		:rtype: callable
+		"""
+		def complete_request(record):
+			"""
+			Store the received record as the latest reply, complete the
+			oldest pending request with it, as well as the requests older
+			than the coalescing window, whose replies were probably lost,
+			and notify the subscriber
+			"""
+			now = monotonic()
+			reply = Reply(now, record)
+			completed = []
+			expired = []
+			with self.__lock:
+				self.__latest[message_id] = reply
+				callback = self.__callbacks.get(message_id)
+				pending = self.__pending.get(message_id)
+				if pending:
+					self.__expire(pending, now, expired)
+				# Deadlines of the requests sent before the coalescing window
+				lost = now + self.__timeout - self.__coalesce_window
+				while pending:
+					deadline, future = pending.popleft()
+					# Requests cancelled by their callers are skipped
+					if future.set_running_or_notify_cancel():
+						completed.append(future)
+						if deadline > lost:
+							break
+			_fail(expired, TimeoutError("Timed out while waiting for response"))
+			for future in completed:
+				future.set_result(reply)
+			if callback is not None:
+				callback(reply)
+		return complete_request
+
+def _fail(pending, exception):
+	"""
+	Fail futures that have not been cancelled
+
+	:param pending: futures to fail
+	:type pending: list
+	:param exception: exception set on the futures
+	:type exception: Exception
+	:return: None
+	:rtype: None
+	"""
+	for future in pending:
+		if future.set_running_or_notify_cancel():
+			future.set_exception(exception)
+
+def chain(future, transform):
+	"""
+	Create a future completed with the result of another
+	future once processed by a function
+
+	:param future: source future
+	:type future: concurrent.futures.Future
+	:param transform: function applied to the result of the source future
+	:type transform: callable
+	:return: future completed with the processed result, or with the exception
+	of the source future or of the function
+	:rtype: concurrent.futures.Future
+	"""
+	chained = futures.Future()
+	def complete(source):
+		if source.cancelled():
+			chained.cancel()
+			return
+		if not chained.set_running_or_notify_cancel():
+			return
+		try:
+			chained.set_result(transform(source.result()))
+		except Exception as e:
+			chained.set_exception(e)
+	future.add_done_callback(complete)
+	return chained
+
+def gather(sources, transform):
+	"""
+	Create a future completed with the results of several
+	futures once processed by a function
+
+	:param sources: source futures
+	:type sources: list
+	:param transform: function applied to the list of results of the source futures
+	:type transform: callable
+	:return: future completed with the processed results, or with the exception
+	of the first source future that failed or of the function
+	:rtype: concurrent.futures.Future
+	"""
+	gathered = futures.Future()
+	# Number of sources not done yet, or None once the gathered future is completed
+	remaining = [len(sources)]
+	lock = Lock()
+	def complete(source):
+		failed = source.cancelled() or source.exception() is not None
+		with lock:
+			if remaining[0] is None:
+				return
+			remaining[0] -= 1
+			# Complete as soon as every source is done or any of them fails
+			if remaining[0] and not failed:
+				return
+			remaining[0] = None
+		if not gathered.set_running_or_notify_cancel():
+			return
+		if failed:
+			gathered.set_exception(futures.CancelledError() if source.cancelled() else source.exception())
+			return
+		try:
+			gathered.set_result(transform([future.result() for future in sources]))
+		except Exception as e:
+			gathered.set_exception(e)
+	for source in sources:
+		source.add_done_callback(complete)
+	return gathered
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from threading import Thread, Event, Lock, current_thread
+from time import monotonic, perf_counter
+
+# Upper bounds in seconds of the bins of the jitter histogram. The last
+# bin of the histogram counts the ticks above the last bound
+JITTER_BINS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+# Upper bounds of the bins of the histogram of the achieved rate, as a fraction
+# of the requested rate. The last bin counts the ticks above the last bound
+RATE_BINS = (0.5, 0.9, 0.99, 1.01, 1.1)
+
+class TelemetryScheduler(object):
+	"""
+	Send request messages periodically, each one at its own rate.
+	A single thread keeps track of when every request is due and
+	sends all the requests due at the same time with a single call.
+	If sending fails for any reason other than not being connected,
+	every request is stopped and the exception is kept in the error
+	attribute
+	"""
+
+	def __init__(self, send):
+		"""
+		Initialize the scheduler. Its thread is started when
+		the first request is added
+
+		:param send: function called with the list of the requests that
+		are due, which sends them to the Mosquito
+		:type send: callable
+		"""
+		self.__send = send
+		self.__lock = Lock()
+		# Scheduled requests as [request, period, next deadline], indexed by key
+		self.__requests = {}
+		# Set to wake the thread up when the scheduled requests change
+		self.__wakeup = Event()
+		self.__thread = None
+		# Exception that stopped the requests, if any
+		self.error = None
+
+	def __run(self):
+		"""
+		Send the requests when they are due. This method runs on the scheduler thread
+
+		:return: None
+		:rtype:None
+		"""
+		while True:
+			self.__wakeup.clear()
+			with self.__lock:
+				if not self.__requests:
+					self.__thread = None
+					return
+				now = monotonic()
+				due = []
+				for request in self.__requests.values():
+					if request[2] <= now:
+						due.append(request[0])
+						# Deadlines are absolute so that the rate does not drift. If
+						# running late, the missed requests are skipped instead of
+						# being sent in a burst
+						request[2] += request[1]
+						if request[2] <= now:
+							request[2] = now + request[1]
+				next_deadline = min(request[2] for request in self.__requests.values())
+			if due:
+				try:
+					self.__send(due)
+				except ConnectionError:
+					# Not connected. Requests are skipped until connected again
+					pass
+				except Exception as e:
+					self.error = e
+					with self.__lock:
+						self.__requests.clear()
+					continue
+			self.__wakeup.wait(max(0.0, next_deadline - monotonic()))
+
+	def add(self, key, request, rate):
+		"""
+		Start sending a request periodically. If a request with
+		the same key is already scheduled its rate is updated
+
+		:param key: key identifying the request
+		:type key: hashable
+		:param request: request passed to the send function when due
+		:type request: object
+		:param rate: number of times per second the request is sent
+		:type rate: float
+		:return: None
+		:rtype:None
+		"""
+		if rate <= 0:
+			raise ValueError('The rate must be greater than 0')
+		with self.__lock:
+			self.__requests[key] = [request, 1.0/rate, monotonic()]
+			if self.__thread is None:
+				self.__thread = Thread(target=self.__run)
+				self.__thread.daemon = True
+				self.__thread.start()
+		self.__wakeup.set()
+
+	def remove(self, key):
+		"""
+		Stop sending a request. The thread stops when no requests are left
+
+		:param key: key identifying the request
+		:type key: hashable
+		:return: None
+		:rtype:None
+		"""
+		with self.__lock:
+			self.__requests.pop(key, None)
+		self.__wakeup.set()
+
+	def clear(self):
+		"""
+		Stop sending every request and forget the error that stopped them, if any
+
+		:return: None
+		:rtype:None
+		"""
+		with self.__lock:
+			self.__requests.clear()
+			self.error = None
+		self.__wakeup.set()
+
+class StreamStats(object):
+	"""
+	Timing statistics of a setpoint stream. The jitter of a tick is
+	how late it was sent with respect to its deadline, and its rate is
+	the inverse of the time elapsed since the previous tick
+	"""
+
+	def __init__(self, rate):
+		"""
+		Initialize the statistics
+
+		:param rate: requested number of ticks per second
+		:type rate: float
+		"""
+		self.requested_rate = rate
+		self.ticks = 0
+		self.missed = 0
+		self.max_jitter = 0.0
+		self.jitter = [0] * (len(JITTER_BINS) + 1)
+		self.rate = [0] * (len(RATE_BINS) + 1)
+		self.__first = None
+		self.__last = None
+
+	def tick(self, deadline, now):
+		"""
+		Record a tick
+
+		:param deadline: time at which the tick was due
+		:type deadline: float
+		:param now: time at which the tick was sent
+		:type now: float
+		:return: None
+		:rtype:None
+		"""
+		jitter = now - deadline
+		self.jitter[_bin(JITTER_BINS, jitter)] += 1
+		self.max_jitter = max(self.max_jitter, jitter)
+		if self.__last is not None and now > self.__last:
+			self.rate[_bin(RATE_BINS, 1.0/(now - self.__last)/self.requested_rate)] += 1
+		else:
+			self.__first = now
+		self.__last = now
+		self.ticks += 1
+
+	def achieved_rate(self):
+		"""
+		Get the average number of ticks per second
+
+		:return: achieved rate, or 0.0 before the second tick
+		:rtype: float
+		"""
+		if self.ticks < 2 or self.__last == self.__first:
+			return 0.0
+		return (self.ticks - 1)/(self.__last - self.__first)
+
+	def snapshot(self):
+		"""
+		Get the statistics as a dictionary. Histograms are indexed by
+		the upper bound of their bins, None being the last one
+
+		:return: statistics
+		:rtype: dict
+		"""
+		return {
+			'ticks': self.ticks,
+			'missed': self.missed,
+			'achieved_rate': self.achieved_rate(),
+			'max_jitter': self.max_jitter,
+			'jitter': dict(zip(JITTER_BINS + (None,), self.jitter)),
+			'rate': dict(zip(RATE_BINS + (None,), self.rate)),
+		}
+
+def _bin(bounds, value):
+	"""
+	Get the index of the histogram bin of a value
+
+	:param bounds: upper bounds of the bins
+	:type bounds: tuple
+	:param value: value to place in a bin
+	:type value: float
+	:return: bin index
+	:rtype: int
+	"""
+	for idx, bound in enumerate(bounds):
+		if value < bound:
+			return idx
+	return len(bounds)
+
+class SetpointStream(object):
+	"""
+	Send setpoints at a fixed rate from a thread. Ticks are scheduled on
+	absolute deadlines, so that the time spent getting and sending the
+	setpoints does not make the rate drift. Ticks that are missed because
+	of running late are skipped instead of being sent in a burst
+	"""
+
+	def __init__(self, send, source, rate, on_stop=None):
+		"""
+		Initialize the stream and start sending setpoints
+
+		:param send: function called with every setpoint
+		:type send: callable
+		:param source: function called without arguments every tick that returns
+		the setpoint, or iterator of setpoints. If the setpoint is None, nothing
+		is sent that tick. The stream stops when the iterator is exhausted
+		:type source: callable or iterator
+		:param rate: number of setpoints per second
+		:type rate: float
+		:param on_stop: function called without arguments when the stream stops
+		:type on_stop: callable
+		"""
+		if rate <= 0:
+			raise ValueError('The rate must be greater than 0')
+		self.__send = send
+		self.__source = source if callable(source) else iter(source).__next__
+		self.__period = 1.0/rate
+		self.__on_stop = on_stop
+		self.__stopped = Event()
+		self.stats = StreamStats(rate)
+		# Exception that stopped the stream, if any
+		self.error = None
+		self.__thread = Thread(target=self.__run)
+		self.__thread.daemon = True
+		self.__thread.start()
+
+	def __run(self):
+		"""
+		Send the setpoints. This method runs on the stream thread
+
+		:return: None
+		:rtype:None
+		"""
+		period = self.__period
+		start = perf_counter()
+		tick = 0
+		try:
+			while not self.__stopped.is_set():
+				deadline = start + tick*period
+				delay = deadline - perf_counter()
+				if delay > 0 and self.__stopped.wait(delay):
+					break
+				try:
+					setpoint = self.__source()
+				except StopIteration:
+					break
+				if setpoint is not None:
+					self.__send(setpoint)
+				self.stats.tick(deadline, perf_counter())
+				tick += 1
+				# A tick that is late is sent straight away, but ticks
+				# that are already a full period late are skipped
+				late = int((perf_counter() - start)/period) - tick
+				if late > 0:
+					self.stats.missed += late
+					tick += late
+		except Exception as e:
+			self.error = e
+		finally:
+			self.__stopped.set()
+			if self.__on_stop is not None:
+				try:
+					self.__on_stop()
+				except Exception as e:
+					self.error = self.error or e
+
+	def running(self):
+		"""
+		Check if the stream is still sending setpoints
+
+		:return: True if running and False otherwise
+		:rtype: bool
+		"""
+		return not self.__stopped.is_set()
+
+	def stop(self, call_on_stop=True):
+		"""
+		Stop sending setpoints. It waits until the stream has stopped,
+		unless called from the stream itself (e.g. from the source)
+
+		:param call_on_stop: call the function given when creating the stream, unless
+		the stream has already stopped by itself and it has already been called
+		:type call_on_stop: bool
+		:return: None
+		:rtype:None
+		"""
+		if not call_on_stop:
+			self.__on_stop = None
+		self.__stopped.set()
+		if current_thread() is not self.__thread:
+			self.__thread.join()
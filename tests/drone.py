@@ -0,0 +1,135 @@
+'''
+drone.py Fake Mosquito used by the tests
+
+It listens on a local TCP port, records every message it receives and
+replies to the requests of the messages it knows with fixed values.
+'''
+
+import socket
+import struct
+import threading
+import time
+
+def frame(message_id, payload, direction=b'>'):
+	'''
+	Returns an MSP frame, built byte by byte independently of msppg
+	'''
+	body = bytes([len(payload), message_id]) + payload
+	crc = 0
+	for byte in body:
+		crc ^= byte
+	return b'$M' + direction + body + bytes([crc])
+
+def messages(data):
+	'''
+	Returns the (message ID, payload) of every request frame in data
+	'''
+	found = []
+	offset = 0
+	while True:
+		start = data.find(b'$M<', offset)
+		if start < 0 or start + 5 > len(data):
+			return found
+		length = data[start + 3]
+		found.append((data[start + 4], bytes(data[start + 5:start + 5 + length])))
+		offset = start + 6 + length
+
+# Payloads of the replies, indexed by message ID
+REPLIES = {
+	27: bytes([1]),
+	50: bytes([7]),
+	103: struct.pack('<fff', 1, 2, 3),
+	121: struct.pack('<ffffff', *range(6)),
+	122: struct.pack('<fff', 0.25, 0.5, 0.75),
+	124: struct.pack('<ffff', 0.25, 0.5, 0.75, 1),
+	125: struct.pack('<f', 3.5),
+	127: struct.pack('<' + 'f' * 19, *range(19)),
+}
+
+class FakeDrone(object):
+	'''
+	Fake Mosquito listening on a local port. If reply is False
+	requests are recorded but never replied.
+	'''
+
+	def __init__(self, reply=True):
+		self.reply = reply
+		self.received = bytearray()
+		self.__lock = threading.Lock()
+		self.__server = socket.socket()
+		self.__server.bind(('127.0.0.1', 0))
+		self.__server.listen(5)
+		self.port = self.__server.getsockname()[1]
+		self.__connections = []
+		# Set when a connection is closed by the client
+		self.__closed = threading.Event()
+		thread = threading.Thread(target=self.__accept)
+		thread.daemon = True
+		thread.start()
+
+	def __accept(self):
+		while True:
+			try:
+				connection, _ = self.__server.accept()
+			except OSError:
+				return
+			self.__connections.append(connection)
+			thread = threading.Thread(target=self.__serve, args=(connection,))
+			thread.daemon = True
+			thread.start()
+
+	def __serve(self, connection):
+		pending = bytearray()
+		while True:
+			try:
+				data = connection.recv(4096)
+			except OSError:
+				return
+			if not data:
+				self.__closed.set()
+				return
+			with self.__lock:
+				self.received += data
+			pending += data
+			# Reply to every complete request
+			while True:
+				start = pending.find(b'$M<')
+				if start < 0 or len(pending) < start + 6 or len(pending) < start + 6 + pending[start + 3]:
+					break
+				length, message_id = pending[start + 3], pending[start + 4]
+				del pending[:start + 6 + length]
+				if self.reply and length == 0 and message_id in REPLIES:
+					connection.sendall(frame(message_id, REPLIES[message_id]))
+
+	def ids(self):
+		'''
+		Returns the IDs of the messages received so far, in order
+		'''
+		with self.__lock:
+			return [message_id for message_id, _ in messages(self.received)]
+
+	def wait_for(self, message_id, timeout=2.0):
+		'''
+		Waits until a message is received and returns the
+		IDs of the messages received so far
+		'''
+		deadline = time.monotonic() + timeout
+		while message_id not in self.ids():
+			if time.monotonic() > deadline:
+				raise AssertionError('Message {} not received'.format(message_id))
+			time.sleep(0.005)
+		return self.ids()
+
+	def wait_closed(self, timeout=2.0):
+		'''
+		Waits until the client closes the connection and returns
+		the IDs of every message received
+		'''
+		if not self.__closed.wait(timeout):
+			raise AssertionError('Connection not closed')
+		return self.ids()
+
+	def close(self):
+		self.__server.close()
+		for connection in self.__connections:
+			connection.close()
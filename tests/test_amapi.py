@@ -0,0 +1,102 @@
+'''
+Tests of the asyncio Mosquito API
+'''
+
+import asyncio
+import unittest
+
+from mosquito import amapi, msppg
+from tests.drone import FakeDrone
+
+ARM = msppg.MESSAGE_IDS['WP_ARM']
+STOP = msppg.MESSAGE_IDS['SET_EMERGENCY_STOP']
+LAND = msppg.MESSAGE_IDS['WP_LAND']
+LEDS = msppg.MESSAGE_IDS['SET_LEDS']
+VOLTAGE = msppg.MESSAGE_IDS['GET_BATTERY_VOLTAGE']
+ATTITUDE = msppg.MESSAGE_IDS['ATTITUDE_RADIANS']
+VELOCITIES = msppg.MESSAGE_IDS['GET_VELOCITIES']
+MOTORS = msppg.MESSAGE_IDS['GET_MOTOR_NORMAL']
+
+class AsyncMosquitoTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+
+	def tearDown(self):
+		self.drone.close()
+
+	def run_with_mosquito(self, test):
+		async def run():
+			mosquito = amapi.AsyncMosquito('127.0.0.1', self.drone.port, timeout=1)
+			await mosquito.connect()
+			try:
+				return await test(mosquito)
+			finally:
+				await mosquito.disconnect()
+		return asyncio.run(run())
+
+	def test_getter_inside_a_batch(self):
+		async def test(mosquito):
+			with mosquito.batch():
+				await mosquito.arm()
+				voltage = await mosquito.get_voltage()
+			return voltage
+		self.assertEqual(self.run_with_mosquito(test), 3.5)
+		# The request is sent straight away and the rest of the batch when leaving it
+		self.assertEqual(self.drone.wait_for(ARM), [VOLTAGE, ARM])
+
+	def test_stop_inside_a_batch(self):
+		async def test(mosquito):
+			with mosquito.batch():
+				await mosquito.arm()
+				await mosquito.set_motors((0.5, 0.5, 0.5, 0.5))
+				await mosquito.set_leds(red=1)
+				await mosquito.stop()
+				await mosquito.land()
+		self.run_with_mosquito(test)
+		# The stop is sent straight away and the rest of the batch when leaving it
+		self.assertEqual(self.drone.wait_for(LAND), [STOP, LEDS, LAND])
+
+	def test_stop_is_sent_when_the_batch_fails(self):
+		async def test(mosquito):
+			with self.assertRaises(ValueError):
+				with mosquito.batch():
+					await mosquito.arm()
+					await mosquito.stop()
+					raise ValueError('Broken')
+		self.run_with_mosquito(test)
+		self.assertEqual(self.drone.wait_for(STOP), [STOP])
+
+	def test_get_state(self):
+		async def test(mosquito):
+			return await mosquito.get_state()
+		state = self.run_with_mosquito(test)
+		self.assertEqual(tuple(state.attitude), (0.25, 0.5, 0.75))
+		self.assertEqual(tuple(state.velocities), (1, 2, 3))
+		self.assertEqual(tuple(state.motors), (0.25, 0.5, 0.75, 1))
+		self.assertEqual(state.voltage, 3.5)
+		self.assertEqual(state.spread, max(state.timestamps) - min(state.timestamps))
+		self.assertEqual(self.drone.wait_for(VOLTAGE), [ATTITUDE, VELOCITIES, MOTORS, VOLTAGE])
+
+	def test_max_age_reuses_the_latest_reply(self):
+		async def test(mosquito):
+			first = await mosquito.get_voltage()
+			second = await mosquito.get_voltage(max_age=10)
+			return first, second
+		self.assertEqual(self.run_with_mosquito(test), (3.5, 3.5))
+		self.assertEqual(self.drone.ids(), [VOLTAGE])
+
+	def test_failed_request_does_not_take_later_replies(self):
+		async def run():
+			mosquito = amapi.AsyncMosquito('127.0.0.1', self.drone.port, timeout=1)
+			with self.assertRaises(Exception):
+				await mosquito.get_voltage()
+			await mosquito.connect()
+			try:
+				return await mosquito.get_voltage()
+			finally:
+				await mosquito.disconnect()
+		self.assertEqual(asyncio.run(run()), 3.5)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,297 @@
+'''
+Tests of the communications with the Mosquito: the order in which messages
+are sent, the shared reactor and the receive loop
+'''
+
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from mosquito import mapi, msppg
+from mosquito.coms import MosquitoComms, Reactor, RING_SLOTS, _Outbox, _REQUEST
+from tests.drone import FakeDrone, frame
+
+ARM = msppg.MESSAGE_IDS['WP_ARM']
+DISARM = msppg.MESSAGE_IDS['WP_DISARM']
+TAKE_OFF = msppg.MESSAGE_IDS['WP_TAKE_OFF']
+GO_FORWARD = msppg.MESSAGE_IDS['WP_GO_FORWARD']
+LAND = msppg.MESSAGE_IDS['WP_LAND']
+STOP = msppg.MESSAGE_IDS['SET_EMERGENCY_STOP']
+MOTORS = msppg.MESSAGE_IDS['SET_MOTOR_NORMAL']
+LEDS = msppg.MESSAGE_IDS['SET_LEDS']
+VOLTAGE = msppg.MESSAGE_IDS['GET_BATTERY_VOLTAGE']
+LOST_SIGNAL = msppg.MESSAGE_IDS['LOST_SIGNAL']
+RC = msppg.MESSAGE_IDS['SET_RC_NORMAL']
+
+class WireOrderTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+		self.mosquito = mapi.Mosquito('127.0.0.1', self.drone.port)
+		self.mosquito.connect()
+
+	def tearDown(self):
+		self.mosquito.disconnect()
+		self.drone.close()
+
+	def test_commands_keep_their_order(self):
+		self.mosquito.arm()
+		self.mosquito.take_off(100)
+		self.mosquito.move_forward(2)
+		self.mosquito.land()
+		self.assertEqual(self.drone.wait_for(LAND), [ARM, TAKE_OFF, GO_FORWARD, LAND])
+
+	def test_batch_keeps_its_order(self):
+		with self.mosquito.batch():
+			self.mosquito.arm()
+			self.mosquito.take_off(100)
+			self.mosquito.land()
+		self.assertEqual(self.drone.wait_for(LAND), [ARM, TAKE_OFF, LAND])
+
+	def test_nothing_sent_before_stop_follows_it(self):
+		for _ in range(100):
+			self.mosquito.set_motors((0.5, 0.5, 0.5, 0.5))
+			self.mosquito.set_leds(red=1)
+			self.mosquito.arm()
+			self.mosquito.stop()
+		# Disconnecting waits until every queued message has been written
+		self.mosquito.disconnect()
+		ids = self.drone.wait_closed()
+		# Messages queued before a stop are either sent before it or dropped,
+		# except the LED values, which are kept
+		ids = [message_id for message_id in ids if message_id != LEDS]
+		self.assertEqual(ids[-1], STOP)
+		self.assertEqual(ids.count(STOP), 100)
+
+	def test_stop_keeps_the_led_values(self):
+		with self.mosquito.batch():
+			self.mosquito.set_motors((0.5, 0.5, 0.5, 0.5))
+			self.mosquito.set_leds(red=1)
+			self.mosquito.stop()
+		self.mosquito.disconnect()
+		self.assertEqual(self.drone.wait_closed(), [STOP, LEDS])
+
+	def test_stop_resets_the_motor_values(self):
+		self.mosquito.set_motors((0.5, 0.5, 0.5, 0.5))
+		self.mosquito.stop()
+		self.mosquito.set_motor(1, 0.25)
+		self.mosquito.disconnect()
+		self.drone.wait_closed()
+		expected = msppg.serialize_SET_MOTOR_NORMAL(0.25, 0, 0, 0)
+		self.assertEqual(self.drone.received[-len(expected):], expected)
+
+	def test_urgent_message_drops_the_batch(self):
+		with self.mosquito.batch():
+			self.mosquito.arm()
+			self.mosquito.take_off(100)
+			self.mosquito.disarm()
+			self.mosquito.land()
+		self.assertEqual(self.drone.wait_for(LAND), [DISARM, LAND])
+
+class SetpointTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+		self.mosquito = mapi.Mosquito('127.0.0.1', self.drone.port, timeout=1)
+		self.mosquito.connect()
+
+	def tearDown(self):
+		self.mosquito.disconnect()
+		self.drone.close()
+
+	def test_invalid_values_raise_to_the_caller(self):
+		with self.assertRaises(Exception):
+			self.mosquito.set_motors((0.1, 0.2, 0.3))
+		with self.assertRaises(Exception):
+			self.mosquito.set_leds(red=256)
+		# The writer keeps working
+		self.assertEqual(self.mosquito.get_voltage(), 3.5)
+		self.mosquito.set_motor(1, 0.5)
+		self.mosquito.disconnect()
+		expected = msppg.serialize_SET_MOTOR_NORMAL(0.5, 0, 0, 0)
+		self.assertEqual(self.drone.wait_closed()[-1], MOTORS)
+		self.assertEqual(self.drone.received[-len(expected):], expected)
+
+	def test_invalid_stream_values_stop_the_stream(self):
+		stream = self.mosquito.stream_motors(lambda: (0.1, 0.2, 0.3), 100)
+		time.sleep(0.05)
+		self.assertFalse(stream.running())
+		self.assertIsNotNone(stream.error)
+		self.assertEqual(self.mosquito.get_voltage(), 3.5)
+
+class OutboxTest(unittest.TestCase):
+
+	def test_newer_setpoint_replaces_the_last_one(self):
+		outbox = _Outbox()
+		outbox.put_setpoint('SET_MOTOR_NORMAL', b'a')
+		outbox.put_setpoint('SET_MOTOR_NORMAL', b'b')
+		self.assertEqual(outbox.take(), b'b')
+
+	def test_newer_setpoint_does_not_overtake_commands(self):
+		outbox = _Outbox()
+		outbox.put_setpoint('SET_MOTOR_NORMAL', b'a')
+		outbox.put(b'arm')
+		outbox.put_setpoint('SET_MOTOR_NORMAL', b'b')
+		self.assertEqual(outbox.take(), b'armb')
+
+	def test_urgent_message_keeps_requests_and_leds(self):
+		outbox = _Outbox()
+		outbox.put(b'land')
+		outbox.put_setpoint('SET_LEDS', b'leds')
+		outbox.put_setpoint('SET_RC_NORMAL', b'rc')
+		outbox.put(b'request', _REQUEST)
+		outbox.put_urgent(b'stop')
+		self.assertEqual(outbox.take(), b'stopledsrequest')
+
+class BatchTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+		self.mosquito = mapi.Mosquito('127.0.0.1', self.drone.port, timeout=1)
+		self.mosquito.connect()
+
+	def tearDown(self):
+		self.mosquito.disconnect()
+		self.drone.close()
+
+	def test_getter_inside_a_batch(self):
+		with self.mosquito.batch():
+			self.mosquito.arm()
+			voltage = self.mosquito.get_voltage()
+		self.assertEqual(voltage, 3.5)
+		# The request is sent straight away and the rest of the batch when leaving it
+		self.assertEqual(self.drone.wait_for(ARM), [VOLTAGE, ARM])
+
+class DisconnectTest(unittest.TestCase):
+
+	def test_disconnect_stops_schedules_and_streams(self):
+		drone = FakeDrone()
+		self.addCleanup(drone.close)
+		mosquito = mapi.Mosquito('127.0.0.1', drone.port)
+		mosquito.connect()
+		mosquito.schedule('voltage', 100)
+		motors = mosquito.stream_motors(lambda: (0, 0, 0, 0), 100)
+		transmitter = mosquito.stream_RC(lambda: (0, 0, 0, 0, 0, 0), 100)
+		drone.wait_for(VOLTAGE)
+		mosquito.disconnect()
+		self.assertFalse(motors.running())
+		self.assertFalse(transmitter.running())
+		# The Mosquito is told that the virtual transmitter stopped
+		self.assertEqual(drone.wait_closed()[-1], LOST_SIGNAL)
+
+class VirtualTransmitterTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+		self.mosquito = mapi.Mosquito('127.0.0.1', self.drone.port)
+		self.mosquito.connect()
+
+	def tearDown(self):
+		self.mosquito.disconnect()
+		self.drone.close()
+
+	def test_replaced_stream_does_not_lose_the_signal(self):
+		first = self.mosquito.stream_RC(lambda: (0, 0, 0, 0, 0, 0), 200)
+		self.drone.wait_for(RC)
+		second = self.mosquito.stream_RC(lambda: (1, 0, 0, 0, 0, 0), 200)
+		self.assertFalse(first.running())
+		self.assertTrue(second.running())
+		time.sleep(0.05)
+		self.assertNotIn(LOST_SIGNAL, self.drone.ids())
+		second.stop()
+		self.assertEqual(self.drone.wait_for(LOST_SIGNAL)[-1], LOST_SIGNAL)
+
+	def test_lost_signal_does_not_drop_commands(self):
+		stream = self.mosquito.stream_RC(iter([(0, 0, 0, 0, 0, 0)] * 3), 200)
+		self.mosquito.land()
+		self.assertEqual(self.drone.wait_for(LOST_SIGNAL)[-1], LOST_SIGNAL)
+		self.assertFalse(stream.running())
+		self.assertIn(LAND, self.drone.ids())
+
+class ReactorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.reactor = Reactor()
+		self.drones = [FakeDrone() for _ in range(3)]
+		self.mosquitos = [mapi.Mosquito('127.0.0.1', drone.port, timeout=1, reactor=self.reactor) for drone in self.drones]
+		for mosquito in self.mosquitos:
+			mosquito.connect()
+
+	def tearDown(self):
+		for mosquito in self.mosquitos:
+			mosquito.disconnect()
+		self.reactor.close()
+		for drone in self.drones:
+			drone.close()
+
+	def assertReplies(self, mosquitos):
+		for mosquito in mosquitos:
+			self.assertEqual(mosquito.get_voltage(), 3.5)
+			self.assertEqual(mosquito.get_attitude(), (0.25, 0.5, 0.75))
+
+	def test_replies_of_every_connection(self):
+		futures = [mosquito.get_voltage_async() for mosquito in self.mosquitos]
+		self.assertEqual([future.result(1) for future in futures], [3.5] * 3)
+		self.assertReplies(self.mosquitos)
+
+	def test_reconnect(self):
+		self.mosquitos[0].connect()
+		self.assertReplies(self.mosquitos)
+
+	def test_disconnect(self):
+		self.mosquitos[0].disconnect()
+		self.assertRaises(ConnectionError, self.mosquitos[0].get_voltage)
+		self.assertReplies(self.mosquitos[1:])
+		self.mosquitos[0].connect()
+		self.assertReplies(self.mosquitos)
+
+	def test_connection_closed_by_the_mosquito(self):
+		self.drones[0].close()
+		# The closed connection stops being read, the others keep working
+		time.sleep(0.05)
+		self.assertReplies(self.mosquitos[1:])
+		self.mosquitos[0].disconnect()
+		self.assertReplies(self.mosquitos[1:])
+
+class ReceiveTest(unittest.TestCase):
+
+	def setUp(self):
+		self.comms = MosquitoComms(read_size=16)
+		self.received = []
+		self.comms._parser.set_GET_PID_CONSTANTS_Handler(self.received.append, record=True)
+		self.comms._parser.set_GET_BATTERY_VOLTAGE_Handler(self.received.append, record=True)
+
+	def receive(self, data, chunk_size):
+		'''
+		Feeds data to the receive loop in chunks and runs it until the connection is closed
+		'''
+		sock, peer = socket.socketpair()
+		def send():
+			for start in range(0, len(data), chunk_size):
+				peer.sendall(data[start:start + chunk_size])
+			peer.close()
+		thread = threading.Thread(target=send)
+		thread.start()
+		self.comms._MosquitoComms__socket = sock
+		self.comms._MosquitoComms__running = True
+		self.comms._MosquitoComms__run(sock)
+		thread.join()
+		sock.close()
+		self.comms._MosquitoComms__socket = None
+
+	def test_messages_across_the_ring(self):
+		pid = frame(msppg.MESSAGE_IDS['GET_PID_CONSTANTS'], struct.pack('<' + 'f' * 19, *range(19)))
+		voltage = frame(msppg.MESSAGE_IDS['GET_BATTERY_VOLTAGE'], struct.pack('<f', 3.5))
+		data = (pid + voltage) * 10
+		# Enough data for the ring to wrap around several times
+		self.assertGreater(len(data), 16 * RING_SLOTS * 5)
+		for chunk_size in (1, 7, 16, 100):
+			del self.received[:]
+			self.receive(data, chunk_size)
+			self.assertEqual([tuple(record) for record in self.received], [tuple(range(19)), (3.5,)] * 10)
+		self.assertEqual(sum(self.comms.get_link_stats().errors.values()), 0)
+
+if __name__ == '__main__':
+	unittest.main()
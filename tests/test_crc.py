@@ -0,0 +1,51 @@
+'''
+Tests of the checksum of MSP messages
+'''
+
+import array
+import random
+import unittest
+
+from mosquito.msppg import crc8, verify_frames
+from mosquito.msppg.crc import SMALL_SIZE
+from tests.drone import frame
+
+def reference_crc8(data, crc=0):
+	for byte in data:
+		crc ^= byte
+	return crc
+
+class Crc8Test(unittest.TestCase):
+
+	def test_matches_the_byte_loop_at_every_size(self):
+		generator = random.Random(0)
+		for size in range(300):
+			data = bytes(generator.randrange(256) for _ in range(size))
+			self.assertEqual(crc8(data), reference_crc8(data), size)
+			self.assertEqual(crc8(memoryview(bytearray(data))), reference_crc8(data), size)
+
+	def test_continues_from_a_previous_checksum(self):
+		data = bytes(range(200))
+		for split in (0, 1, SMALL_SIZE - 1, SMALL_SIZE, 100, 200):
+			self.assertEqual(crc8(data[split:], crc8(data[:split])), reference_crc8(data))
+
+class VerifyFramesTest(unittest.TestCase):
+
+	def setUp(self):
+		self.frames = [frame(1, b''), frame(2, bytes(range(10))), frame(3, bytes(range(100)))]
+		self.buffer = bytearray(b''.join(self.frames))
+		self.offsets = array.array('i', [0, len(self.frames[0]), len(self.frames[0]) + len(self.frames[1])])
+
+	def test_valid_frames(self):
+		self.assertEqual(verify_frames(self.buffer, self.offsets), [True, True, True])
+
+	def test_corrupt_frame(self):
+		self.buffer[self.offsets[1] + 7] ^= 0xff
+		self.assertEqual(verify_frames(self.buffer, self.offsets), [True, False, True])
+
+	def test_truncated_frames(self):
+		self.assertEqual(verify_frames(self.buffer[:-1], self.offsets), [True, True, False])
+		self.assertEqual(verify_frames(self.buffer, [len(self.buffer) - 2]), [False])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,230 @@
+'''
+Tests of the MSP serializers and parser
+'''
+
+import struct
+import unittest
+
+from mosquito import msppg
+from mosquito.msppg import stats
+from tests.drone import frame
+
+# Frames built by the original hand-written serializers from the arguments
+# returned by arguments(), indexed by serializer name without its prefix.
+# The original request serializer encoded the IDs above 127 as UTF-8, so the
+# request of FAKE_INT is the correct MSP frame instead
+BASELINE_FRAMES = {
+	'ALTITUDE_METERS': '244d3c087b000080be0000a03fd2',
+	'ALTITUDE_METERS_Request': '244d3c007b7b',
+	'ATTITUDE_RADIANS': '244d3c0c7a000080be0000a03f00003040a7',
+	'ATTITUDE_RADIANS_Request': '244d3c007a7a',
+	'CLEAR_EEPROM': '244d3c01c901c9',
+	'ESC_CALIBRATION': '244d3c01180118',
+	'ESC_CALIBRATION_Request': '244d3c001818',
+	'FAKE_INT': '244d3c08c7fdffffff9d860100d7',
+	'FAKE_INT_Request': '244d3c00c7c7',
+	'FIRMWARE_VERSION': '244d3c01320132',
+	'FIRMWARE_VERSION_Request': '244d3c003232',
+	'GET_BATTERY_VOLTAGE': '244d3c047d000080be47',
+	'GET_BATTERY_VOLTAGE_Request': '244d3c007d7d',
+	'GET_MISSION_COMPLETE': '244d3c01740174',
+	'GET_MISSION_COMPLETE_Request': '244d3c007474',
+	'GET_MOTOR_NORMAL': '244d3c107c000080be0000a03f000030400000884075',
+	'GET_MOTOR_NORMAL_Request': '244d3c007c7c',
+	'GET_PID_CONSTANTS': '244d3c4c7f000080be0000a03f00003040000088400000b8400000e84000000c410000244100003c410000544100006c410000824100008e4100009a410000a6410000b2410000be410000ca410000d64137',
+	'GET_PID_CONSTANTS_Request': '244d3c007f7f',
+	'GET_VELOCITIES': '244d3c0c67000080be0000a03f00003040ba',
+	'GET_VELOCITIES_Request': '244d3c006767',
+	'LOITER': '244d3c0c7e000080be0000a03f00003040a3',
+	'LOITER_Request': '244d3c007e7e',
+	'LOST_SIGNAL': '244d3c01e201e2',
+	'MOSQUITO_VERSION': '244d3c01190119',
+	'MOSQUITO_VERSION_Request': '244d3c001919',
+	'POSITION_BOARD': '244d3c011a011a',
+	'POSITION_BOARD_CONNECTED': '244d3c011b011b',
+	'POSITION_BOARD_CONNECTED_Request': '244d3c001b1b',
+	'POSITION_BOARD_Request': '244d3c001a1a',
+	'RAW_IMU': '244d3c126607001ffc37f84ff467f07fec97e8afe4c7e0f3',
+	'RAW_IMU_Request': '244d3c006666',
+	'RC_CALIBRATION': '244d3c01d601d6',
+	'RC_CALIBRATION_STATUS': '244d3c01770177',
+	'RC_CALIBRATION_STATUS_Request': '244d3c007777',
+	'RC_NORMAL': '244d3c1879000080be0000a03f00003040000088400000b8400000e84028',
+	'RC_NORMAL_Request': '244d3c007979',
+	'SET_ARMED': '244d3c01d801d8',
+	'SET_BATTERY_VOLTAGE': '244d3c04e4000080bede',
+	'SET_EMERGENCY_STOP': '244d3c01e501e5',
+	'SET_LEDS': '244d3c03e301264b8c',
+	'SET_MOSQUITO_VERSION': '244d3c01df01df',
+	'SET_MOTOR_NORMAL': '244d3c10d7000080be0000a03f0000304000008840de',
+	'SET_PID_CONSTANTS': '244d3c4ce0000080be0000a03f00003040000088400000b8400000e84000000c410000244100003c410000544100006c410000824100008e4100009a410000a6410000b2410000be410000ca410000d641a8',
+	'SET_POSITIONING_BOARD': '244d3c01e101e1',
+	'SET_RANGE_PARAMETERS': '244d3c0cdd000080be0000a03f0000304000',
+	'SET_RC_NORMAL': '244d3c18de000080be0000a03f00003040000088400000b8400000e8408f',
+	'WP_ARM': '244d3c01010101',
+	'WP_ARM_Request': '244d3c000101',
+	'WP_CHANGE_ALTITUDE': '244d3c020901262c',
+	'WP_CHANGE_ALTITUDE_Request': '244d3c000909',
+	'WP_CHANGE_SPEED': '244d3c020a01262f',
+	'WP_CHANGE_SPEED_Request': '244d3c000a0a',
+	'WP_DISARM': '244d3c01020102',
+	'WP_DISARM_Request': '244d3c000202',
+	'WP_GO_BACKWARD': '244d3c0206012623',
+	'WP_GO_BACKWARD_Request': '244d3c000606',
+	'WP_GO_FORWARD': '244d3c0205012620',
+	'WP_GO_FORWARD_Request': '244d3c000505',
+	'WP_GO_LEFT': '244d3c0207012622',
+	'WP_GO_LEFT_Request': '244d3c000707',
+	'WP_GO_RIGHT': '244d3c020801262d',
+	'WP_GO_RIGHT_Request': '244d3c000808',
+	'WP_HOVER': '244d3c020b01262e',
+	'WP_HOVER_Request': '244d3c000b0b',
+	'WP_LAND': '244d3c01030103',
+	'WP_LAND_Request': '244d3c000303',
+	'WP_MISSION_BEGIN': '244d3c011e011e',
+	'WP_MISSION_BEGIN_Request': '244d3c001e1e',
+	'WP_MISSION_FLAG': '244d3c01170117',
+	'WP_MISSION_FLAG_Request': '244d3c001717',
+	'WP_TAKE_OFF': '244d3c0204012621',
+	'WP_TAKE_OFF_Request': '244d3c000404',
+	'WP_TURN_CCW': '244d3c020d012628',
+	'WP_TURN_CCW_Request': '244d3c000d0d',
+	'WP_TURN_CW': '244d3c020c012629',
+	'WP_TURN_CW_Request': '244d3c000c0c',
+}
+
+def arguments(payload_format):
+	'''
+	Returns deterministic values for the fields of a message, which are
+	exactly representable in every field type
+	'''
+	values = {'B': lambda i: (i*37 + 1) % 256, 'h': lambda i: 7 - i*1000,
+		'i': lambda i: i*100000 - 3, 'f': lambda i: i*1.5 - 0.25}
+	return [values[kind](index) for index, kind in enumerate(payload_format)]
+
+# Messages sent by the Mosquito, as (name, message ID, field values)
+RECEIVED = [(name, message_id, arguments(payload_format))
+	for name, message_id, direction, payload_format, _ in msppg._MESSAGES if direction == '>']
+
+def received_frame(message_id, values):
+	payload_format = next(message[3] for message in msppg._MESSAGES if message[1] == message_id)
+	return frame(message_id, struct.pack('<' + payload_format, *values))
+
+class SerializerTest(unittest.TestCase):
+
+	def test_serializers_match_the_baseline(self):
+		for name, expected in BASELINE_FRAMES.items():
+			if name.endswith('_Request'):
+				data = getattr(msppg, 'serialize_' + name)()
+			else:
+				data = getattr(msppg, 'serialize_' + name)(*arguments(msppg._MESSAGES_BY_NAME[name][3]))
+			self.assertEqual(data.hex(), expected, name)
+
+	def test_every_message_is_covered(self):
+		for name, _, direction, _, _ in msppg._MESSAGES:
+			self.assertIn(name, BASELINE_FRAMES)
+			if direction == '>':
+				self.assertIn(name + '_Request', BASELINE_FRAMES)
+
+	def test_serialize_into_an_offset(self):
+		for name, _, _, payload_format, _ in msppg._MESSAGES:
+			values = arguments(payload_format)
+			expected = getattr(msppg, 'serialize_' + name)(*values)
+			buffer = bytearray(3 + len(expected) + 2)
+			end = getattr(msppg, 'serialize_{}_into'.format(name))(buffer, 3, *values)
+			self.assertEqual(end, 3 + len(expected))
+			self.assertEqual(bytes(buffer[3:end]), expected, name)
+
+	def test_request_frames(self):
+		for name, message_id, _ in RECEIVED:
+			self.assertEqual(msppg.REQUEST_FRAMES[name], msppg.REQUEST_FRAMES[message_id])
+			self.assertEqual(msppg.REQUEST_FRAMES[name], getattr(msppg, 'serialize_{}_Request'.format(name))())
+
+class ParserTest(unittest.TestCase):
+
+	def setUp(self):
+		self.parser = msppg.MSP_Parser()
+		self.received = []
+		for name, message_id, _ in RECEIVED:
+			getattr(self.parser, 'set_{}_Handler'.format(name))(
+				lambda *values, message_id=message_id: self.received.append((message_id, list(values))))
+
+	def expected(self):
+		return [(message_id, values) for _, message_id, values in RECEIVED]
+
+	def stream(self):
+		return b''.join(received_frame(message_id, values) for _, message_id, values in RECEIVED)
+
+	def test_round_trip(self):
+		self.parser.parse_bytes(self.stream())
+		self.assertEqual(self.received, self.expected())
+		self.assertEqual(sum(self.parser.stats.errors.values()), 0)
+
+	def test_records_and_views(self):
+		parser = msppg.MSP_Parser()
+		received = []
+		parser.set_ATTITUDE_RADIANS_Handler(received.append, record=True)
+		parser.set_GET_VELOCITIES_Handler(received.append, lazy=True)
+		parser.parse_bytes(received_frame(122, [0.25, 0.5, 0.75]) + received_frame(103, [1, 2, 3]))
+		self.assertEqual(received[0], msppg.ATTITUDE_RADIANS(0.25, 0.5, 0.75))
+		self.assertEqual(received[0].pitch, 0.5)
+		self.assertEqual(received[1].unpack(), msppg.GET_VELOCITIES(1, 2, 3))
+		self.assertEqual(received[1].vely, 2)
+
+	def test_chunk_split_frames(self):
+		data = self.stream()
+		for chunk_size in (1, 2, 3, 5, 7, 64, 1000):
+			self.received = []
+			for start in range(0, len(data), chunk_size):
+				self.parser.parse_bytes(memoryview(data)[start:start + chunk_size])
+			self.assertEqual(self.received, self.expected(), chunk_size)
+		self.assertEqual(sum(self.parser.stats.errors.values()), 0)
+
+	def test_every_split_point(self):
+		data = received_frame(127, arguments('f' * 19)) + received_frame(50, [7])
+		for split in range(len(data) + 1):
+			self.received = []
+			self.parser.parse_bytes(data[:split])
+			self.parser.parse_bytes(data[split:])
+			self.assertEqual(self.received, [(127, arguments('f' * 19)), (50, [7])], split)
+
+	def test_bytes_between_frames(self):
+		self.parser.parse_bytes(b'xx$' + received_frame(50, [7]) + b'$Mx' + received_frame(125, [3.5]))
+		self.assertEqual(self.received, [(50, [7]), (125, [3.5])])
+		self.assertGreater(self.parser.stats.errors[stats.RESYNC], 0)
+
+	def test_dropped_byte_resyncs_on_the_next_frame(self):
+		corrupt = received_frame(127, arguments('f' * 19))
+		corrupt = corrupt[:20] + corrupt[21:]
+		self.parser.parse_bytes(corrupt + received_frame(50, [7]) + received_frame(125, [3.5]))
+		self.assertEqual(self.received, [(50, [7]), (125, [3.5])])
+		self.assertEqual(self.parser.stats.errors[stats.CRC_FAILURE], 1)
+
+	def test_oversized_length_resyncs(self):
+		self.parser.parse_bytes(b'$M>\xff\x32' + received_frame(50, [7]))
+		self.assertEqual(self.received, [(50, [7])])
+		self.assertEqual(self.parser.stats.errors[stats.OVERSIZED], 1)
+
+	def test_corrupt_checksum(self):
+		corrupt = bytearray(received_frame(125, [3.5]))
+		corrupt[-1] ^= 0xff
+		self.parser.parse_bytes(bytes(corrupt) + received_frame(50, [7]))
+		self.assertEqual(self.received, [(50, [7])])
+		self.assertEqual(self.parser.stats.errors[stats.CRC_FAILURE], 1)
+
+	def test_wrong_payload_size_is_not_dispatched(self):
+		self.parser.parse_bytes(frame(50, b'\x07\x00') + frame(125, b'\x00'))
+		self.assertEqual(self.received, [])
+		self.assertEqual(self.parser.stats.errors[stats.OVERSIZED], 1)
+		self.assertEqual(self.parser.stats.errors[stats.UNDERSIZED], 1)
+
+	def test_handler_errors_are_counted(self):
+		def handler(version):
+			raise ValueError('Broken')
+		self.parser.set_FIRMWARE_VERSION_Handler(handler)
+		self.parser.parse_bytes(received_frame(50, [7]) + received_frame(125, [3.5]))
+		self.assertEqual(self.received, [(125, [3.5])])
+		self.assertEqual(self.parser.stats.errors[stats.HANDLER_ERROR], 1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,93 @@
+'''
+Tests of the table of requests waiting for a reply
+'''
+
+import time
+import unittest
+
+from mosquito.notify import PendingReplies
+
+class PendingRepliesTest(unittest.TestCase):
+
+	def test_replies_complete_requests_in_order(self):
+		replies = PendingReplies()
+		first, new = replies.add(1, coalesce=False)
+		self.assertTrue(new)
+		second, _ = replies.add(1, coalesce=False)
+		publish = replies.publisher(1)
+		publish('a')
+		publish('b')
+		self.assertEqual(first.result(0).record, 'a')
+		self.assertEqual(second.result(0).record, 'b')
+		self.assertEqual(replies.latest(1).record, 'b')
+
+	def test_pending_request_is_shared(self):
+		replies = PendingReplies()
+		first, _ = replies.add(1)
+		second, new = replies.add(1)
+		self.assertIs(first, second)
+		self.assertFalse(new)
+
+	def test_recent_reply_is_reused(self):
+		replies = PendingReplies()
+		replies.publisher(1)('a')
+		future, new = replies.add(1, max_age=10)
+		self.assertFalse(new)
+		self.assertEqual(future.result(0).record, 'a')
+
+	def test_unreplied_request_expires_without_waiting_for_it(self):
+		replies = PendingReplies(timeout=0.05)
+		future, _ = replies.add(1)
+		start = time.monotonic()
+		with self.assertRaises(TimeoutError):
+			future.result(2)
+		self.assertLess(time.monotonic() - start, 1)
+		# A later reply completes a later request, not the expired one
+		later, new = replies.add(1)
+		self.assertTrue(new)
+		replies.publisher(1)('a')
+		self.assertEqual(later.result(0).record, 'a')
+
+	def test_old_request_is_not_shared(self):
+		replies = PendingReplies(coalesce_window=0.02)
+		lost, _ = replies.add(1)
+		time.sleep(0.05)
+		future, new = replies.add(1)
+		self.assertTrue(new)
+		self.assertIsNot(future, lost)
+		# The reply completes the new request and the one whose reply was lost
+		replies.publisher(1)('a')
+		self.assertEqual(future.result(0).record, 'a')
+		self.assertEqual(lost.result(0).record, 'a')
+
+	def test_recent_requests_are_completed_in_order(self):
+		replies = PendingReplies(coalesce_window=0.02)
+		lost, _ = replies.add(1)
+		time.sleep(0.05)
+		first, _ = replies.add(1, coalesce=False)
+		second, _ = replies.add(1, coalesce=False)
+		replies.publisher(1)('a')
+		self.assertEqual(lost.result(0).record, 'a')
+		self.assertEqual(first.result(0).record, 'a')
+		self.assertFalse(second.done())
+		replies.publisher(1)('b')
+		self.assertEqual(second.result(0).record, 'b')
+
+	def test_fail_all(self):
+		replies = PendingReplies()
+		future, _ = replies.add(1)
+		replies.fail_all(ConnectionError('Disconnected'))
+		with self.assertRaises(ConnectionError):
+			future.result(0)
+
+	def test_cancelled_request_is_skipped(self):
+		replies = PendingReplies()
+		first, _ = replies.add(1, coalesce=False)
+		second, _ = replies.add(1, coalesce=False)
+		first.cancel()
+		replies.publisher(1)('a')
+		self.assertTrue(first.cancelled())
+		self.assertEqual(second.result(0).record, 'a')
+
+if __name__ == '__main__':
+	unittest.main()
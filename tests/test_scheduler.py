@@ -0,0 +1,100 @@
+'''
+Tests of the periodic requests and of the setpoint streams
+'''
+
+import threading
+import time
+import unittest
+
+from mosquito import mapi, msppg
+from mosquito.scheduler import TelemetryScheduler, SetpointStream
+from tests.drone import FakeDrone
+
+class TelemetrySchedulerTest(unittest.TestCase):
+
+	def test_due_requests_are_sent_together(self):
+		sent = []
+		scheduler = TelemetryScheduler(sent.append)
+		scheduler.add('a', 'A', 100)
+		scheduler.add('b', 'B', 100)
+		time.sleep(0.1)
+		scheduler.clear()
+		self.assertGreater(len(sent), 3)
+		self.assertIn(['A', 'B'], sent)
+
+	def test_requests_are_skipped_while_not_connected(self):
+		def send(data):
+			raise ConnectionError('Please connect to a Mosquito')
+		scheduler = TelemetryScheduler(send)
+		scheduler.add('a', 'A', 100)
+		time.sleep(0.05)
+		self.assertIsNone(scheduler.error)
+		scheduler.clear()
+
+	def test_other_errors_stop_the_requests(self):
+		calls = []
+		def send(data):
+			calls.append(data)
+			raise ValueError('Broken')
+		scheduler = TelemetryScheduler(send)
+		scheduler.add('a', 'A', 100)
+		time.sleep(0.1)
+		self.assertIsInstance(scheduler.error, ValueError)
+		self.assertEqual(len(calls), 1)
+		scheduler.clear()
+		self.assertIsNone(scheduler.error)
+
+class SetpointStreamTest(unittest.TestCase):
+
+	def test_iterator_is_streamed_until_exhausted(self):
+		sent = []
+		stopped = threading.Event()
+		stream = SetpointStream(sent.append, iter(range(5)), 500, stopped.set)
+		self.assertTrue(stopped.wait(1))
+		self.assertEqual(sent, list(range(5)))
+		self.assertFalse(stream.running())
+		self.assertEqual(stream.stats.ticks, 5)
+
+	def test_source_error_stops_the_stream(self):
+		def source():
+			raise ValueError('Broken')
+		stopped = threading.Event()
+		stream = SetpointStream(lambda setpoint: None, source, 500, stopped.set)
+		self.assertTrue(stopped.wait(1))
+		self.assertIsInstance(stream.error, ValueError)
+
+	def test_stop(self):
+		stream = SetpointStream(lambda setpoint: None, lambda: 1, 500)
+		time.sleep(0.02)
+		stream.stop()
+		self.assertFalse(stream.running())
+		self.assertGreater(stream.stats.achieved_rate(), 0)
+
+class ScheduledRequestTest(unittest.TestCase):
+
+	def setUp(self):
+		self.drone = FakeDrone()
+		self.mosquito = mapi.Mosquito('127.0.0.1', self.drone.port, timeout=1)
+		self.mosquito.connect()
+
+	def tearDown(self):
+		self.mosquito.disconnect()
+		self.drone.close()
+
+	def test_getter_shares_the_scheduled_request(self):
+		voltage = msppg.MESSAGE_IDS['GET_BATTERY_VOLTAGE']
+		self.drone.reply = False
+		self.mosquito.schedule('voltage', 1)
+		self.drone.wait_for(voltage)
+		future = self.mosquito.get_voltage_async()
+		time.sleep(0.05)
+		self.assertEqual(self.drone.ids().count(voltage), 1)
+		self.assertFalse(future.done())
+
+	def test_getters_while_scheduled(self):
+		self.mosquito.schedule('attitude', 200)
+		for _ in range(20):
+			self.assertEqual(self.mosquito.get_attitude(), (0.25, 0.5, 0.75))
+
+if __name__ == '__main__':
+	unittest.main()